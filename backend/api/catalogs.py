@@ -0,0 +1,78 @@
+import gzip
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from recipes.cache import catalog_key
+
+
+def render_catalog(queryset, serializer_class):
+    """
+    Рендеринг справочника в JSON и gzip с ETag для каждого варианта.
+    """
+    body = JSONRenderer().render(serializer_class(queryset, many=True).data)
+    etag = sha256(body).hexdigest()
+    return {
+        "identity": (body, f'"{etag}"'),
+        "gzip": (gzip.compress(body, mtime=0), f'"{etag}-gzip"'),
+    }
+
+
+def get_catalog(queryset, serializer_class):
+    key = catalog_key(queryset.model)
+    catalog = cache.get(key)
+    if catalog is None:
+        catalog = render_catalog(queryset, serializer_class)
+        cache.set(key, catalog, None)
+    return catalog
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Принимает ли клиент gzip по заголовку Accept-Encoding. Учитываются
+    q-значения: gzip;q=0 — отказ, * подходит, если gzip не указан явно.
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+
+def catalog_response(request, queryset, serializer_class):
+    """
+    Ответ с заранее отрендеренным справочником. Отдает gzip, если клиент
+    его принимает, и 304, если ETag из If-None-Match совпадает.
+    """
+    catalog = get_catalog(queryset, serializer_class)
+    encoding = (
+        "gzip"
+        if accepts_gzip(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        else "identity"
+    )
+    body, etag = catalog[encoding]
+
+    if_none_match = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+    if etag in if_none_match or "*" in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+        if encoding == "gzip":
+            response["Content-Encoding"] = "gzip"
+
+    response["ETag"] = etag
+    response["Cache-Control"] = f"public, max-age={settings.CATALOG_MAX_AGE}"
+    response["Vary"] = "Accept-Encoding"
+    return response
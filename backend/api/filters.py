@@ -1,7 +1,17 @@
 from django_filters import rest_framework
 from rest_framework.filters import SearchFilter
 
-from recipes.models import Recipe, Tag
+from recipes.cache import get_recipe_ids
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (
+    Favorite,
+    Recipe,
+    RecipeRanking,
+    ShoppingCart,
+    Tag,
+)
+from recipes.rankings import ranked
+from recipes.search import search_recipes
 
 
 class RecipeFilter(rest_framework.FilterSet):
@@ -16,23 +26,45 @@ class RecipeFilter(rest_framework.FilterSet):
     is_in_shopping_cart = rest_framework.BooleanFilter(
         method="get_is_in_shopping_cart"
     )
+    search = rest_framework.CharFilter(method="get_search")
+    ordering = rest_framework.ChoiceFilter(
+        choices=RecipeRanking.KINDS, method="get_ordering"
+    )
 
     def get_favorite(self, queryset, name, value):
         user = self.request.user
         if value and not user.is_anonymous:
-            return queryset.filter(favorites__user=self.request.user)
+            return queryset.filter(pk__in=get_recipe_ids(user, Favorite))
         return queryset
 
     def get_is_in_shopping_cart(self, queryset, name, value):
         user = self.request.user
         if value and not user.is_anonymous:
-            return queryset.filter(shopping_list__user=self.request.user)
+            return queryset.filter(
+                pk__in=get_recipe_ids(user, ShoppingCart)
+            )
         return queryset
 
+    def get_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def get_ordering(self, queryset, name, value):
+        return ranked(queryset, value)
+
     class Meta:
         model = Recipe
         fields = ("tags", "author")
 
 
 class IngredientFilter(SearchFilter):
+    """
+    Поиск ингредиентов по названию через индекс в памяти процесса.
+    """
+
     search_param = "name"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        if not query.strip() or view.action != "list":
+            return super().filter_queryset(request, queryset, view)
+        return ingredient_index.search(query)
@@ -1,6 +1,129 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class SixPagePagination(PageNumberPagination):
     page_size_query_param = "limit"
     page_size = 6
+
+
+class RecipePagination(SixPagePagination):
+    """
+    Постраничная пагинация рецептов с опциональным режимом курсора.
+
+    Режим курсора включается параметром ?pagination=cursor, заголовком
+    X-Pagination: cursor или наличием параметра ?cursor. Страница
+    выбирается по ключу (pub_date, id) без OFFSET и COUNT(*).
+    Списки со своим порядком — по рейтингу (?ordering=) и по
+    релевантности поиска (?search=) — листаются по номеру страницы.
+    """
+
+    cursor_query_param = "cursor"
+    mode_query_param = "pagination"
+    # Параметры, которые задают порядок, отличный от (pub_date, id).
+    ordering_query_params = ("ordering", "search")
+    mode_header = "X-Pagination"
+    invalid_cursor_message = "Неверный курсор."
+
+    def is_cursor_mode(self, request):
+        if any(
+            request.query_params.get(param)
+            for param in self.ordering_query_params
+        ):
+            return False
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == "cursor"
+            or request.headers.get(self.mode_header) == "cursor"
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.is_cursor_mode(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by("-pub_date", "-id")
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            pub_date, pk = position
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+            )
+
+        page = list(queryset[: page_size + 1])
+        self.has_next = len(page) > page_size
+        self.page = page[:page_size]
+        return self.page
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = urlsafe_b64decode(encoded.encode()).decode()
+            pub_date, pk = position.split("|")
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, pk
+
+    def encode_cursor(self, recipe):
+        position = f"{recipe.pub_date.isoformat()}|{recipe.pk}"
+        return urlsafe_b64encode(position.encode()).decode()
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", None),
+                    ("results", data),
+                ]
+            )
+        )
+
+
+class FeedPagination(RecipePagination):
+    """
+    Пагинация ленты подписок: всегда по курсору. Рецепты страницы
+    отбираются по курсору заранее, вместе с одним лишним рецептом,
+    по которому видно, есть ли следующая страница.
+    """
+
+    def is_cursor_mode(self, request):
+        return True
+
+    def paginate_queryset(self, recipes, request, view=None):
+        self.cursor_mode = True
+        self.request = request
+        page_size = self.get_page_size(request)
+        self.has_next = len(recipes) > page_size
+        self.page = recipes[:page_size]
+        return self.page
@@ -0,0 +1,251 @@
+import zlib
+from functools import lru_cache
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import (
+    FF_NONSYMBOLIC,
+    FF_SYMBOLIC,
+    SUBSETN,
+    TTFont,
+    makeToUnicodeCMap,
+)
+
+
+MARGIN = 50
+FONT_SIZE = 12
+LEADING = 16
+
+
+@lru_cache()
+def register_font(path):
+    """
+    Регистрация TrueType-шрифта в reportlab один раз на процесс.
+    Шрифт нужен для ширин символов и сборки подмножеств глифов.
+    """
+    name = f"ShoppingList-{len(pdfmetrics.getRegisteredFontNames())}"
+    pdfmetrics.registerFont(TTFont(name, path))
+    return name
+
+
+def split_word(text, font, width):
+    """
+    Перенос по символам строки без пробелов, которая шире страницы.
+    """
+    lines = []
+    start = 0
+    line_width = 0
+    for end, char in enumerate(text):
+        char_width = pdfmetrics.stringWidth(char, font, FONT_SIZE)
+        if line_width + char_width > width and end > start:
+            lines.append(text[start:end])
+            start, line_width = end, 0
+        line_width += char_width
+    lines.append(text[start:])
+    return lines
+
+
+def wrap(lines, font, width):
+    """
+    Перенос строк по словам, чтобы длинные названия ингредиентов
+    не выходили за поля страницы.
+    """
+    for line in lines:
+        for part in simpleSplit(line, font, FONT_SIZE, width) or [""]:
+            if pdfmetrics.stringWidth(part, font, FONT_SIZE) > width:
+                yield from split_word(part, font, width)
+            else:
+                yield part
+
+
+def pdf_number(value):
+    return f"{value:.3f}".rstrip("0").rstrip(".")
+
+
+class StreamingPDF:
+    """
+    Постраничная генерация PDF: каждая страница отдается клиенту,
+    как только заполнена, в памяти хранятся только смещения объектов
+    и использованные символы.
+
+    Символы кодируются подмножествами шрифта по 256 глифов, как это
+    делает reportlab. Сами подмножества встраиваются после последней
+    страницы, когда известен весь набор символов; страницы ссылаются
+    на словарь шрифтов, который пишется в конце.
+    """
+
+    width, height = A4
+    first_page_object = 4
+
+    def __init__(self, font_path):
+        self.font_name = register_font(font_path)
+        self.font = pdfmetrics.getFont(self.font_name)
+        self.offset = 0
+        self.offsets = {}
+        self.pages = []
+
+    @property
+    def lines_per_page(self):
+        return int((self.height - 2 * MARGIN) // LEADING)
+
+    def write(self, data):
+        self.offset += len(data)
+        return data
+
+    def write_object(self, number, body, stream=None):
+        self.offsets[number] = self.offset
+        data = f"{number} 0 obj\n".encode() + body
+        if stream is not None:
+            data += b"\nstream\n" + stream + b"\nendstream"
+        return self.write(data + b"\nendobj\n")
+
+    def write_stream(self, number, content, **entries):
+        content = zlib.compress(content)
+        entries = "".join(f" /{key} {value}" for key, value in entries.items())
+        return self.write_object(
+            number,
+            (
+                f"<< /Length {len(content)} /Filter /FlateDecode{entries} >>"
+            ).encode(),
+            content,
+        )
+
+    def encode(self, text):
+        # Состояние подмножеств reportlab хранит по ключу документа.
+        return " ".join(
+            f"/F{subset} {FONT_SIZE} Tf <{chunk.hex()}> Tj"
+            for subset, chunk in self.font.splitString(text, self)
+        )
+
+    def render_page(self, lines):
+        number = self.first_page_object + 2 * len(self.pages)
+        self.pages.append(number)
+        top = self.height - MARGIN - FONT_SIZE
+        commands = ["BT", f"{LEADING} TL", f"{MARGIN} {pdf_number(top)} Td"]
+        commands.extend(f"{self.encode(line)} T*" for line in lines)
+        commands.append("ET")
+
+        return self.write_object(
+            number,
+            (
+                f"<< /Type /Page /Parent 2 0 R "
+                f"/MediaBox [0 0 {pdf_number(self.width)} "
+                f"{pdf_number(self.height)}] "
+                f"/Resources << /Font 3 0 R >> "
+                f"/Contents {number + 1} 0 R >>"
+            ).encode(),
+        ) + self.write_stream(number + 1, "\n".join(commands).encode())
+
+    def render_subset(self, index, subset, number):
+        """
+        Объекты подмножества шрифта: шрифт, описание, программа шрифта
+        и таблица соответствия кодов символам Юникода.
+        """
+        face = self.font.face
+        base_font = b"".join(
+            (SUBSETN(index), b"+", face.name, face.subfontNameX)
+        ).decode("latin-1")
+        widths = " ".join(
+            pdf_number(face.getCharWidth(code)) for code in subset
+        )
+        bbox = " ".join(map(pdf_number, face.bbox))
+        flags = face.flags & ~FF_NONSYMBOLIC | FF_SYMBOLIC
+        program = face.makeSubset(subset)
+
+        yield self.write_object(
+            number,
+            (
+                f"<< /Type /Font /Subtype /TrueType /BaseFont /{base_font} "
+                f"/FirstChar 0 /LastChar {len(subset) - 1} "
+                f"/Widths [{widths}] /FontDescriptor {number + 1} 0 R "
+                f"/ToUnicode {number + 3} 0 R >>"
+            ).encode(),
+        )
+        yield self.write_object(
+            number + 1,
+            (
+                f"<< /Type /FontDescriptor /FontName /{base_font} "
+                f"/Flags {flags} /FontBBox [{bbox}] "
+                f"/ItalicAngle {pdf_number(face.italicAngle)} "
+                f"/Ascent {pdf_number(face.ascent)} "
+                f"/Descent {pdf_number(face.descent)} "
+                f"/CapHeight {pdf_number(face.capHeight)} "
+                f"/StemV {face.stemV} "
+                f"/MissingWidth {pdf_number(face.defaultWidth)} "
+                f"/FontFile2 {number + 2} 0 R >>"
+            ).encode(),
+        )
+        yield self.write_stream(number + 2, program, Length1=len(program))
+        yield self.write_stream(
+            number + 3, makeToUnicodeCMap(base_font, subset).encode()
+        )
+
+    def render_fonts(self):
+        state = self.font.state.pop(self, None)
+        subsets = state.subsets if state is not None else []
+        number = self.first_page_object + 2 * len(self.pages)
+        fonts = []
+        for index, subset in enumerate(subsets):
+            fonts.append(f"/F{index} {number} 0 R")
+            yield from self.render_subset(index, subset, number)
+            number += 4
+        yield self.write_object(3, f"<< {' '.join(fonts)} >>".encode())
+
+    def render(self, lines):
+        """
+        Генератор байтов документа по строкам текста: заголовок,
+        затем по фрагменту на страницу и в конце шрифты и таблица
+        ссылок.
+        """
+        yield self.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+        page = []
+        for line in wrap(lines, self.font_name, self.width - 2 * MARGIN):
+            page.append(line)
+            if len(page) == self.lines_per_page:
+                yield self.render_page(page)
+                page = []
+        if page or not self.pages:
+            yield self.render_page(page)
+
+        trailer = list(self.render_fonts())
+        kids = " ".join(f"{number} 0 R" for number in self.pages)
+        trailer.append(
+            self.write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        )
+        trailer.append(
+            self.write_object(
+                2,
+                (
+                    f"<< /Type /Pages /Kids [{kids}] "
+                    f"/Count {len(self.pages)} >>"
+                ).encode(),
+            )
+        )
+
+        size = max(self.offsets) + 1
+        xref = self.offset
+        entries = ["0000000000 65535 f "]
+        entries.extend(
+            f"{self.offsets[number]:010d} 00000 n "
+            for number in range(1, size)
+        )
+        trailer.append(
+            self.write(
+                (
+                    f"xref\n0 {size}\n" + "\n".join(entries) + "\n"
+                    f"trailer\n<< /Size {size} /Root 1 0 R >>\n"
+                    f"startxref\n{xref}\n%%EOF\n"
+                ).encode()
+            )
+        )
+        yield b"".join(trailer)
+
+
+def render_pdf(lines, font_path):
+    """
+    PDF со строками lines на страницах A4 шрифтом font_path,
+    по фрагменту байтов на страницу.
+    """
+    return StreamingPDF(font_path).render(lines)
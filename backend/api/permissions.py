@@ -8,7 +8,10 @@ class IsAuthorOrAdminOrReadOnly(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        return True
+        return (
+            request.method in permissions.SAFE_METHODS
+            or request.user.is_authenticated
+        )
 
     def has_object_permission(self, request, view, obj):
         return (
@@ -16,3 +19,23 @@ class IsAuthorOrAdminOrReadOnly(permissions.BasePermission):
             or obj.author == request.user
             or request.user.is_staff
         )
+
+
+class IsCurrentUserOrAdminOrReadOnly(permissions.BasePermission):
+    """
+    Изменение и удаление пользователя — только им самим
+    и администратором, чтение — для любого пользователя.
+    """
+
+    def has_permission(self, request, view):
+        return (
+            request.method in permissions.SAFE_METHODS
+            or request.user.is_authenticated
+        )
+
+    def has_object_permission(self, request, view, obj):
+        return (
+            request.method in permissions.SAFE_METHODS
+            or obj == request.user
+            or request.user.is_staff
+        )
@@ -0,0 +1,56 @@
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer
+
+
+class ShoppingListNegotiation(DefaultContentNegotiation):
+    """
+    Формат списка покупок выбирается параметром ?format= или заголовком
+    Accept; при неподходящем Accept отдается формат по умолчанию.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        try:
+            return super().select_renderer(request, renderers, format_suffix)
+        except NotAcceptable:
+            format = format_suffix or request.query_params.get(
+                self.settings.URL_FORMAT_OVERRIDE
+            )
+            renderer = next(
+                (item for item in renderers if item.format == format),
+                renderers[0],
+            )
+            return renderer, renderer.media_type
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """
+    Рендерер формата списка покупок. Сам список отдается потоком
+    из представления, рендерер используется для выбора формата
+    и для ответов с ошибками.
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, dict) and "detail" in data:
+            data = data["detail"]
+        return str(data).encode("utf-8")
+
+
+class TextShoppingListRenderer(ShoppingListRenderer):
+    media_type = "text/plain"
+    format = "txt"
+
+
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class PDFShoppingListRenderer(ShoppingListRenderer):
+    media_type = "application/pdf"
+    format = "pdf"
+    charset = None
@@ -1,10 +1,29 @@
-from drf_extra_fields.fields import Base64ImageField
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework.fields import ReadOnlyField, SerializerMethodField
-from rest_framework.serializers import (IntegerField, ModelSerializer,
+from rest_framework.relations import ManyRelatedField
+from rest_framework.serializers import (IntegerField, ListField,
+                                        ListSerializer, ModelSerializer,
+                                        PrimaryKeyRelatedField, Serializer,
                                         ValidationError)
 
+from recipes.bulk import bulk_create_with_pks
+from recipes.cache import bump_recipe_versions, recipe_representation_key
+from recipes.counters import increment
+from recipes.feed import fan_out
+from recipes.images import schedule_variants
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredients,
                             ShoppingCart, Tag)
+from recipes.pantry import pantry_index
+from recipes.search import build_search_text
+from recipes.serializers import ImageVariantField, RecipeImageField
+from recipes.shopping_cart import propagate_recipe_change
+from recipes.similarity import schedule_similar_refresh
+from users.models import User
 from users.serializers import CustomUserSerializer
 
 
@@ -43,16 +62,62 @@ class RecipeIngredientsSerializer(ModelSerializer):
         fields = ("id", "name", "amount", "measurement_unit")
 
 
+def get_origin(request):
+    return f"{request.scheme}://{request.get_host()}"
+
+
+class RecipeListSerializer(ListSerializer):
+    """
+    Сериализатор списка рецептов, собирающий ответ из кэша.
+    """
+
+    def to_representation(self, data):
+        recipes = list(data)
+        origin = get_origin(self.context["request"])
+        keys = {
+            recipe.pk: self.child.cache_key(recipe, origin)
+            for recipe in recipes
+        }
+        cached = cache.get_many(keys.values())
+
+        misses = [
+            recipe for recipe in recipes if keys[recipe.pk] not in cached
+        ]
+        prefetch_related_objects(misses, *self.child.prefetch)
+        rendered = {
+            keys[recipe.pk]: self.child.render(recipe) for recipe in misses
+        }
+        cache.set_many(
+            rendered, settings.RECIPE_REPRESENTATION_CACHE_TIMEOUT
+        )
+
+        representation = []
+        for recipe in recipes:
+            key = keys[recipe.pk]
+            if key in rendered:
+                representation.append(rendered[key])
+            else:
+                representation.append(self.child.overlay(recipe, cached[key]))
+        return representation
+
+
 class RecipeSerializer(ModelSerializer):
     """
     Сериализатор для просмотра рецепта.
+
+    Не зависящая от пользователя часть ответа кэшируется по версии
+    рецепта, флаги избранного, корзины и подписки подставляются
+    при каждом запросе.
     """
 
+    prefetch = ("tags", "recipe_ingredients__ingredient")
+
     author = CustomUserSerializer(many=False, read_only=True)
     ingredients = RecipeIngredientsSerializer(
         source="recipe_ingredients", many=True, read_only=True
     )
     tags = TagsSerializer(many=True)
+    image = ImageVariantField()
     is_favorited = SerializerMethodField(
         read_only=True, method_name="get_is_favorited"
     )
@@ -64,6 +129,8 @@ class RecipeSerializer(ModelSerializer):
         request = self.context.get("request")
         if request.user.is_anonymous:
             return False
+        if "favorite_ids" in self.context:
+            return recipe.id in self.context["favorite_ids"]
         return Favorite.objects.filter(
             user=request.user, recipe__id=recipe.id
         ).exists()
@@ -72,11 +139,45 @@ class RecipeSerializer(ModelSerializer):
         request = self.context.get("request")
         if request.user.is_anonymous:
             return False
+        if "shopping_cart_ids" in self.context:
+            return recipe.id in self.context["shopping_cart_ids"]
         return ShoppingCart.objects.filter(
             user=request.user, recipe__id=recipe.id
         ).exists()
 
+    def render(self, recipe):
+        return super().to_representation(recipe)
+
+    def overlay(self, recipe, data):
+        """
+        Подстановка флагов текущего пользователя в закэшированный ответ.
+        """
+        author = self.fields["author"]
+        data["is_favorited"] = self.get_is_favorited(recipe)
+        data["is_in_shopping_cart"] = self.get_is_in_shopping_cart(recipe)
+        data["author"]["is_subscribed"] = author.get_is_subscribed(
+            recipe.author
+        )
+        return data
+
+    def cache_key(self, recipe, origin):
+        return recipe_representation_key(
+            recipe, origin, self.context.get("image_variant", "full")
+        )
+
+    def to_representation(self, recipe):
+        key = self.cache_key(recipe, get_origin(self.context["request"]))
+        data = cache.get(key)
+        if data is not None:
+            return self.overlay(recipe, data)
+
+        prefetch_related_objects([recipe], *self.prefetch)
+        data = self.render(recipe)
+        cache.set(key, data, settings.RECIPE_REPRESENTATION_CACHE_TIMEOUT)
+        return data
+
     class Meta:
+        list_serializer_class = RecipeListSerializer
         fields = (
             "is_favorited",
             "is_in_shopping_cart",
@@ -92,92 +193,261 @@ class RecipeSerializer(ModelSerializer):
         model = Recipe
 
 
+class PrimaryKeysField(ManyRelatedField):
+    """
+    Список первичных ключей, который проверяется одним запросом
+    вместо запроса на каждый ключ. Объекты, заранее загруженные
+    для пакета рецептов, берутся из контекста.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+
+        child = self.child_relation
+        pks = []
+        for pk in data:
+            try:
+                pks.append(int(pk))
+            except (TypeError, ValueError):
+                child.fail("incorrect_type", data_type=type(pk).__name__)
+        pks = list(dict.fromkeys(pks))
+
+        objects = self.context.get("preloaded", {}).get(self.field_name)
+        if objects is None:
+            objects = child.get_queryset().in_bulk(pks)
+        for pk in pks:
+            if pk not in objects:
+                child.fail("does_not_exist", pk_value=pk)
+        return [objects[pk] for pk in pks]
+
+
 class CreateRecipeSerializer(ModelSerializer):
     """
     Сериализатор для создания рецепта.
     """
 
     author = CustomUserSerializer(many=False, read_only=True)
+    tags = PrimaryKeysField(
+        child_relation=PrimaryKeyRelatedField(queryset=Tag.objects.all()),
+        allow_empty=False,
+        label="Теги",
+    )
     ingredients = RecipeIngredientsSerializer(
         source="recipe_ingredients", many=True, read_only=True
     )
-    image = Base64ImageField()
+    image = RecipeImageField()
 
-    def validate(self, data):
+    def get_ingredient_amounts(self):
         """
-        Метод валидации ингредиентов для рецепта.
+        Количества ингредиентов из запроса по их id. В multipart/form-data
+        ингредиенты передаются строкой JSON.
         """
         ingredients_data = self.initial_data.get("ingredients")
+        if isinstance(ingredients_data, str):
+            try:
+                ingredients_data = json.loads(ingredients_data)
+            except ValueError:
+                raise ValidationError("Ингредиенты должны быть списком JSON!")
 
         if not ingredients_data:
             raise ValidationError("Добавьте хотя бы один ингредиент!")
 
-        ingredients_list = []
+        amounts = {}
         for ingredient in ingredients_data:
-            ingredient_id = ingredient["id"]
-
-            if int(ingredient["amount"]) <= 0:
+            try:
+                ingredient_id = int(ingredient["id"])
+                amount = int(ingredient["amount"])
+            except (KeyError, TypeError, ValueError):
                 raise ValidationError(
-                    "Количество ингредиентов должно быть не меньше 1!"
+                    "Укажите id и количество каждого ингредиента!"
                 )
 
-            if not Ingredient.objects.filter(id=ingredient_id).exists():
+            if amount <= 0:
                 raise ValidationError(
-                    f"Не существует ингредиента с id={ingredient_id}!"
+                    "Количество ингредиентов должно быть не меньше 1!"
                 )
 
-            if ingredient_id in ingredients_list:
+            if ingredient_id in amounts:
                 raise ValidationError("Ингредиент не должен повторяться!")
 
-            ingredients_list.append(ingredient_id)
+            amounts[ingredient_id] = amount
+        return amounts
+
+    def validate(self, data):
+        """
+        Метод валидации ингредиентов для рецепта. Все ингредиенты
+        проверяются одним запросом.
+        """
+        amounts = self.get_ingredient_amounts()
+
+        names = self.context.get("preloaded", {}).get("ingredients")
+        if names is None:
+            names = dict(
+                Ingredient.objects.filter(id__in=amounts).values_list(
+                    "id", "name"
+                )
+            )
+        for ingredient_id in amounts:
+            if ingredient_id not in names:
+                raise ValidationError(
+                    f"Не существует ингредиента с id={ingredient_id}!"
+                )
 
+        data["ingredient_amounts"] = amounts
+        data["ingredient_names"] = [names[pk] for pk in amounts]
         return data
 
-    def create_ingredients(self, ingredients, recipe):
+    def set_search_text(self, validated_data, recipe=None):
+        names = validated_data.pop("ingredient_names")
+        if recipe is None:
+            recipe = Recipe(**validated_data)
+        else:
+            recipe.name = validated_data.get("name", recipe.name)
+            recipe.text = validated_data.get("text", recipe.text)
+        validated_data["search_text"] = build_search_text(recipe, names)
+
+    def create_ingredients(self, amounts, recipe):
         """
         Метод создания ингредиентов для рецепта.
         """
         RecipeIngredients.objects.bulk_create(
             [
                 RecipeIngredients(
-                    ingredient=Ingredient.objects.get(id=ingredient["id"]),
+                    ingredient_id=ingredient_id,
                     recipe=recipe,
-                    amount=ingredient["amount"],
+                    amount=amount,
                 )
-                for ingredient in ingredients
+                for ingredient_id, amount in amounts.items()
             ]
         )
 
+    def update_ingredients(self, amounts, recipe):
+        """
+        Метод изменения ингредиентов рецепта: удаляются, обновляются
+        и добавляются только изменившиеся строки.
+        Возвращает прежние количества ингредиентов.
+        """
+        current = {
+            ingredient_id: (pk, amount)
+            for pk, ingredient_id, amount in RecipeIngredients.objects.filter(
+                recipe=recipe
+            ).values_list("pk", "ingredient_id", "amount")
+        }
+
+        removed = [
+            pk
+            for ingredient_id, (pk, _) in current.items()
+            if ingredient_id not in amounts
+        ]
+        if removed:
+            RecipeIngredients.objects.filter(pk__in=removed).delete()
+
+        changed = [
+            RecipeIngredients(pk=pk, amount=amounts[ingredient_id])
+            for ingredient_id, (pk, amount) in current.items()
+            if ingredient_id in amounts and amounts[ingredient_id] != amount
+        ]
+        if changed:
+            RecipeIngredients.objects.bulk_update(changed, ("amount",))
+
+        added = {
+            ingredient_id: amount
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current
+        }
+        if added:
+            self.create_ingredients(added, recipe)
+
+        return {
+            ingredient_id: amount
+            for ingredient_id, (_, amount) in current.items()
+        }
+
+    @transaction.atomic
     def create(self, validated_data):
         """
         Метод создания рецепта.
         """
-        ingredients_data = self.initial_data.get("ingredients")
+        amounts = validated_data.pop("ingredient_amounts")
         tags = validated_data.pop("tags")
+        self.set_search_text(validated_data)
 
         recipe = Recipe.objects.create(
             author=self.context["request"].user, **validated_data
         )
 
-        self.create_ingredients(ingredients_data, recipe)
-        recipe.tags.set(tags)
+        self.create_ingredients(amounts, recipe)
+        recipe.tags.add(*tags)
 
         return recipe
 
+    @transaction.atomic
     def update(self, recipe, validated_data):
         """
         Метод изменения рецепта.
         """
-        recipe.ingredients.clear()
-        recipe.tags.clear()
-        ingredients_data = self.initial_data.get("ingredients")
-        tags = validated_data.pop("tags")
-        recipe.tags.set(tags)
-        RecipeIngredients.objects.filter(recipe=recipe).all().delete()
+        amounts = validated_data.pop("ingredient_amounts")
+        self.set_search_text(validated_data, recipe)
+        if "tags" in validated_data:
+            recipe.tags.set(validated_data.pop("tags"))
+
+        old_amounts = self.update_ingredients(amounts, recipe)
+        propagate_recipe_change(recipe, old_amounts, amounts)
+        if old_amounts.keys() != amounts.keys():
+            pantry_index.invalidate()
+        recipe = super().update(recipe, validated_data)
+        bump_recipe_versions(Recipe.objects.filter(pk=recipe.pk))
 
-        self.create_ingredients(ingredients_data, recipe)
+        return recipe
+
+    @staticmethod
+    @transaction.atomic
+    def bulk_create(serializers, author):
+        """
+        Создание рецептов из нескольких проверенных сериализаторов
+        тремя вставками: рецепты, их ингредиенты и теги.
+        """
+        recipes, amounts, tags = [], [], []
+        for serializer in serializers:
+            validated_data = dict(serializer.validated_data)
+            amounts.append(validated_data.pop("ingredient_amounts"))
+            tags.append(validated_data.pop("tags"))
+            serializer.set_search_text(validated_data)
+            recipes.append(Recipe(author=author, **validated_data))
+
+        bulk_create_with_pks(Recipe, recipes)
+        RecipeIngredients.objects.bulk_create(
+            RecipeIngredients(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for recipe, recipe_amounts in zip(recipes, amounts)
+            for ingredient_id, amount in recipe_amounts.items()
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tag)
+            for recipe, recipe_tags in zip(recipes, tags)
+            for tag in recipe_tags
+        )
 
-        return super().update(recipe, validated_data)
+        # bulk_create не отправляет сигналы, счетчик автора
+        # увеличивается на весь пакет сразу.
+        increment(User, author.pk, "recipes_count", len(recipes))
+        fan_out(recipes, author)
+        for serializer, recipe in zip(serializers, recipes):
+            serializer.instance = recipe
+        schedule_variants(recipes)
+        schedule_similar_refresh(recipes)
+        pantry_index.invalidate()
+        return recipes
+
+    def to_representation(self, recipe):
+        prefetch_related_objects(
+            [recipe], "tags", "recipe_ingredients__ingredient"
+        )
+        return super().to_representation(recipe)
 
     class Meta:
         fields = (
@@ -193,12 +463,52 @@ class CreateRecipeSerializer(ModelSerializer):
         model = Recipe
 
 
+def parse_ids(values):
+    for value in values:
+        try:
+            yield int(value)
+        except (TypeError, ValueError):
+            continue
+
+
+def preload_recipe_relations(items):
+    """
+    Теги и ингредиенты, на которые ссылается пакет рецептов:
+    по одному запросу на весь пакет.
+    """
+    tag_ids, ingredient_ids = set(), set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        tags = item.get("tags")
+        if isinstance(tags, list):
+            tag_ids.update(parse_ids(tags))
+        ingredients = item.get("ingredients")
+        if isinstance(ingredients, list):
+            ingredient_ids.update(
+                parse_ids(
+                    ingredient.get("id")
+                    for ingredient in ingredients
+                    if isinstance(ingredient, dict)
+                )
+            )
+
+    return {
+        "tags": Tag.objects.in_bulk(tag_ids),
+        "ingredients": dict(
+            Ingredient.objects.filter(id__in=ingredient_ids).values_list(
+                "id", "name"
+            )
+        ),
+    }
+
+
 class RecipeShortInfo(ModelSerializer):
     """
     Сериализатор отображения избранного.
     """
 
-    image = Base64ImageField()
+    image = ImageVariantField(variant="thumbnail")
 
     class Meta:
         model = Recipe
@@ -210,6 +520,12 @@ class ShoppingCartSerializer(ModelSerializer):
     Сериализатор списка покупок.
     """
 
+    recipe = PrimaryKeyRelatedField(
+        queryset=Recipe.objects.only(
+            *RecipeShortInfo.Meta.fields, "image_variants"
+        )
+    )
+
     def validate(self, data):
         request = self.context.get("request")
         recipe = data["recipe"]
@@ -236,6 +552,12 @@ class FavoriteSerializer(ModelSerializer):
     Сериализатор избранных рецептов.
     """
 
+    recipe = PrimaryKeyRelatedField(
+        queryset=Recipe.objects.only(
+            *RecipeShortInfo.Meta.fields, "image_variants"
+        )
+    )
+
     class Meta:
         model = Favorite
         fields = ("user", "recipe")
@@ -253,3 +575,19 @@ class FavoriteSerializer(ModelSerializer):
         return RecipeShortInfo(
             instance.recipe, context={"request": self.context.get("request")}
         ).data
+
+
+class PantrySerializer(Serializer):
+    """
+    Параметры подбора рецептов по продуктам: id ингредиентов, которые
+    есть у пользователя, и сколько ингредиентов может не хватать.
+    """
+
+    ingredients = ListField(
+        child=IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.PANTRY_MAX_INGREDIENTS,
+    )
+    missing = IntegerField(
+        min_value=0, max_value=settings.PANTRY_MAX_MISSING, default=0
+    )
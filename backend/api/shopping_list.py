@@ -0,0 +1,86 @@
+import csv
+
+from django.conf import settings
+
+from .pdf import render_pdf
+
+
+CHUNK_SIZE = 8192
+
+
+def buffered(chunks):
+    """
+    Объединение мелких фрагментов ответа в блоки по CHUNK_SIZE байт.
+    """
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def shopping_list_lines(user, ingredients, today):
+    yield f"Список покупок для: {user.get_full_name()}"
+    yield ""
+    yield f"Дата: {today:%Y-%m-%d}"
+    yield ""
+    for ingredient in ingredients:
+        yield (
+            f'- {ingredient["ingredient__name"]} '
+            f'({ingredient["ingredient__measurement_unit"]})'
+            f' - {ingredient["amount"]}'
+        )
+    yield ""
+    yield f"Foodgram ({today:%Y})"
+
+
+def stream_txt(user, ingredients, today):
+    lines = shopping_list_lines(user, ingredients, today)
+    yield next(lines).encode()
+    for line in lines:
+        yield f"\n{line}".encode()
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def stream_csv(user, ingredients, today):
+    writer = csv.writer(Echo())
+    yield "\ufeff".encode()
+    yield writer.writerow(
+        ("Ингредиент", "Единица измерения", "Количество")
+    ).encode()
+    for ingredient in ingredients:
+        yield writer.writerow(
+            (
+                ingredient["ingredient__name"],
+                ingredient["ingredient__measurement_unit"],
+                ingredient["amount"],
+            )
+        ).encode()
+
+
+def stream_pdf(user, ingredients, today):
+    yield from render_pdf(
+        shopping_list_lines(user, ingredients, today),
+        settings.SHOPPING_LIST_FONT,
+    )
+
+
+STREAMS = {
+    "txt": stream_txt,
+    "csv": stream_csv,
+    "pdf": stream_pdf,
+}
+
+
+def stream_shopping_list(format, user, ingredients, today):
+    return buffered(STREAMS[format](user, ingredients, today))
@@ -1,10 +1,19 @@
 from datetime import datetime
 
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Exists,
+    OuterRef,
+    Prefetch,
+    prefetch_related_objects,
+)
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import (
     AllowAny,
     IsAuthenticated,
@@ -17,22 +26,45 @@ from recipes.models import (
     Favorite,
     Ingredient,
     Recipe,
-    RecipeIngredients,
+    RecipeRanking,
     ShoppingCart,
+    ShoppingCartIngredient,
     Tag,
 )
+from recipes.cache import get_recipe_ids
+from recipes.feed import feed_recipe_ids
+from recipes.pantry import PantryMatches
+from recipes.shopping_cart import (
+    add_to_shopping_list,
+    remove_from_shopping_list,
+)
+from users.models import Follow, User
 
+from .catalogs import catalog_response
 from .filters import IngredientFilter, RecipeFilter
-from .paginations import SixPagePagination
+from .paginations import (
+    FeedPagination,
+    RecipePagination,
+    SixPagePagination,
+)
 from .permissions import IsAuthorOrAdminOrReadOnly
+from .renderers import (
+    CSVShoppingListRenderer,
+    PDFShoppingListRenderer,
+    ShoppingListNegotiation,
+    TextShoppingListRenderer,
+)
 from .serializers import (
     CreateRecipeSerializer,
     FavoriteSerializer,
     IngredientsSerializer,
+    PantrySerializer,
     RecipeSerializer,
     ShoppingCartSerializer,
     TagsSerializer,
+    preload_recipe_relations,
 )
+from .shopping_list import stream_shopping_list
 
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
@@ -44,6 +76,9 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     permission_classes = (AllowAny,)
 
+    def list(self, request, *args, **kwargs):
+        return catalog_response(request, self.get_queryset(), TagsSerializer)
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -56,6 +91,16 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = (IngredientFilter,)
     search_fields = ("^name",)
 
+    def list(self, request, *args, **kwargs):
+        """
+        Без поискового запроса отдается заранее отрендеренный справочник.
+        """
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        return catalog_response(
+            request, self.get_queryset(), IngredientsSerializer
+        )
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     """
@@ -64,15 +109,210 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     queryset = Recipe.objects.all()
     permission_classes = (IsAuthorOrAdminOrReadOnly,)
-    pagination_class = SixPagePagination
+    pagination_class = RecipePagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    # Списки рецептов, в которых картинка показывается карточкой.
+    card_actions = ("list", "feed", "trending", "similar", "pantry")
+
+    def get_queryset(self):
+        """
+        Аннотирует авторов рецептов флагом подписки текущего пользователя.
+        Теги и ингредиенты загружаются сериализатором только для рецептов,
+        которых нет в кэше.
+        """
+        user = self.request.user
+
+        if user.is_anonymous:
+            return Recipe.objects.select_related("author")
+
+        return Recipe.objects.prefetch_related(
+            Prefetch(
+                "author",
+                queryset=User.objects.annotate(
+                    is_subscribed=Exists(
+                        Follow.objects.filter(
+                            user=user, author=OuterRef("pk")
+                        )
+                    )
+                ),
+            )
+        )
+
+    def get_serializer_context(self):
+        """
+        Передает сериализатору закэшированные id рецептов из избранного
+        и корзины текущего пользователя и размер картинки: в списке —
+        карточка, на странице рецепта — полноразмерная.
+        """
+        context = super().get_serializer_context()
+        user = self.request.user
+
+        if self.action in self.card_actions:
+            context["image_variant"] = "card"
+
+        if (
+            self.action in ("retrieve", *self.card_actions)
+            and user.is_authenticated
+        ):
+            context["favorite_ids"] = get_recipe_ids(user, Favorite)
+            context["shopping_cart_ids"] = get_recipe_ids(user, ShoppingCart)
+
+        return context
 
     def get_serializer_class(self):
         if self.request.method == "GET":
             return RecipeSerializer
         return CreateRecipeSerializer
 
+    @action(
+        detail=False,
+        methods=["POST"],
+        permission_classes=(IsAuthenticated,),
+    )
+    def batch(self, request):
+        """
+        Метод пакетного создания рецептов. Принимает список рецептов
+        в формате POST /api/recipes/ и возвращает для каждого созданный
+        рецепт или ошибки; корректные рецепты создаются, даже если
+        в пакете есть ошибочные.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"errors": "Ожидается непустой список рецептов."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.RECIPE_BATCH_MAX_SIZE:
+            return Response(
+                {
+                    "errors": "В пакете не больше "
+                    f"{settings.RECIPE_BATCH_MAX_SIZE} рецептов."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        context = self.get_serializer_context()
+        context["preloaded"] = preload_recipe_relations(items)
+        serializers = [
+            CreateRecipeSerializer(data=item, context=context)
+            for item in items
+        ]
+        valid = [
+            serializer for serializer in serializers if serializer.is_valid()
+        ]
+
+        if valid:
+            author = User.objects.annotate(
+                is_subscribed=Exists(
+                    Follow.objects.filter(
+                        user=request.user, author=OuterRef("pk")
+                    )
+                )
+            ).get(pk=request.user.pk)
+            recipes = CreateRecipeSerializer.bulk_create(valid, author)
+            prefetch_related_objects(
+                recipes, "tags", "recipe_ingredients__ingredient"
+            )
+
+        results = [
+            {"errors": serializer.errors}
+            if serializer.errors
+            else serializer.data
+            for serializer in serializers
+        ]
+        if len(valid) == len(serializers):
+            response_status = status.HTTP_201_CREATED
+        elif valid:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(results, status=response_status)
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        permission_classes=(IsAuthenticated,),
+        pagination_class=FeedPagination,
+    )
+    def feed(self, request):
+        """
+        Метод отображения ленты: рецепты авторов, на которых подписан
+        текущий пользователь, от новых к старым. Листается курсором.
+        """
+        paginator = self.paginator
+        recipe_ids = feed_recipe_ids(
+            request.user,
+            paginator.decode_cursor(request),
+            paginator.get_page_size(request) + 1,
+        )
+        recipes = self.get_queryset().in_bulk(recipe_ids)
+        page = paginator.paginate_queryset(
+            [recipes[pk] for pk in recipe_ids if pk in recipes], request
+        )
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        pagination_class=SixPagePagination,
+    )
+    def trending(self, request):
+        """
+        Метод отображения рецептов, набирающих популярность: список
+        рецептов с ?ordering=trending, фильтры те же.
+        """
+        params = request.query_params.copy()
+        params["ordering"] = RecipeRanking.TRENDING
+        filterset = self.filterset_class(
+            params, self.get_queryset(), request=request
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        page = self.paginate_queryset(filterset.qs)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        pagination_class=SixPagePagination,
+    )
+    def pantry(self, request):
+        """
+        Метод подбора рецептов по продуктам: рецепты, для которых
+        хватает ингредиентов ?ingredients= или не хватает не больше
+        ?missing=. Сначала рецепты, которых не хватает меньше.
+        """
+        params = PantrySerializer(
+            data={
+                "ingredients": request.query_params.getlist("ingredients"),
+                "missing": request.query_params.get("missing", 0),
+            }
+        )
+        params.is_valid(raise_exception=True)
+        page = self.paginate_queryset(
+            PantryMatches(self.get_queryset(), **params.validated_data)
+        )
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["GET"], pagination_class=None)
+    def similar(self, request, pk=None):
+        """
+        Метод отображения похожих рецептов: готовый список из таблицы
+        похожих рецептов, от самых похожих.
+        """
+        recipe = get_object_or_404(Recipe.objects.only("pk"), pk=pk)
+        recipes = (
+            self.get_queryset()
+            .filter(similar_to__recipe=recipe)
+            .order_by("-similar_to__score", "id")
+        )
+        serializer = self.get_serializer(recipes, many=True)
+        return Response(serializer.data)
+
     @action(
         methods=["POST", "DELETE"],
         detail=True,
@@ -88,14 +328,18 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 data=data, context={"request": request}
             )
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
+                add_to_shopping_list(request.user, pk)
 
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         cart = ShoppingCart.objects.filter(user=request.user, recipe__id=pk)
 
         if cart.exists():
-            cart.delete()
+            with transaction.atomic():
+                cart.delete()
+                remove_from_shopping_list([request.user.id], pk)
             return Response(status=status.HTTP_204_NO_CONTENT)
 
         return Response(
@@ -134,11 +378,22 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
     @action(
-        detail=False, methods=["GET"], permission_classes=(IsAuthenticated,)
+        detail=False,
+        methods=["GET"],
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            TextShoppingListRenderer,
+            CSVShoppingListRenderer,
+            PDFShoppingListRenderer,
+        ),
+        content_negotiation_class=ShoppingListNegotiation,
     )
     def download_shopping_cart(self, request):
         """
-        Метод для скачивания корзины покупок.
+        Метод для скачивания корзины покупок в формате txt, csv или pdf
+        (?format=). Файл формируется потоком по мере чтения из БД,
+        суммы ингредиентов берутся из поддерживаемой таблицы
+        ShoppingCartIngredient.
         """
         user = request.user
 
@@ -146,32 +401,28 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return Response(status=HTTP_400_BAD_REQUEST)
 
         ingredients = (
-            RecipeIngredients.objects.filter(
-                recipe__shopping_list__user=request.user
+            ShoppingCartIngredient.objects.filter(user=user, amount__gt=0)
+            .values(
+                "ingredient__name", "ingredient__measurement_unit", "amount"
             )
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(amount=Sum("amount"))
+            .order_by("ingredient__name", "ingredient__measurement_unit")
         )
 
-        today = datetime.today()
-        shopping_list = (
-            f"Список покупок для: {user.get_full_name()}\n\n"
-            f"Дата: {today:%Y-%m-%d}\n\n"
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            stream_shopping_list(
+                renderer.format,
+                user,
+                ingredients.iterator(),
+                datetime.today(),
+            ),
+            content_type=(
+                f"{renderer.media_type}; charset={renderer.charset}"
+                if renderer.charset
+                else renderer.media_type
+            ),
         )
-
-        shopping_list += "\n".join(
-            [
-                f'- {ingredient["ingredient__name"]} '
-                f'({ingredient["ingredient__measurement_unit"]})'
-                f' - {ingredient["amount"]}'
-                for ingredient in ingredients
-            ]
-        )
-
-        shopping_list += f"\n\nFoodgram ({today:%Y})"
-
-        filename = f"{user.username}_shopping_list.txt"
-        response = HttpResponse(shopping_list, content_type="text/plain")
+        filename = f"{user.username}_shopping_list.{renderer.format}"
         response["Content-Disposition"] = f"attachment; filename={filename}"
 
         return response
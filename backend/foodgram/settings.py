@@ -85,6 +85,66 @@ DATABASES = {
 }
 
 
+# Cache
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", default="foodgram"),
+    }
+}
+
+RECIPE_IDS_CACHE_TIMEOUT = 60 * 60
+RECIPE_REPRESENTATION_CACHE_TIMEOUT = 60 * 60 * 24
+CATALOG_MAX_AGE = 60
+RECIPE_BATCH_MAX_SIZE = 500
+
+# Варианты картинок рецептов: название -> максимальные ширина и высота.
+RECIPE_IMAGE_VARIANTS = {
+    "thumbnail": (320, 320),
+    "card": (800, 800),
+    "full": (1600, 1600),
+}
+RECIPE_IMAGE_QUALITY = 80
+
+# Потоки для фоновых задач: вариантов картинок и похожих рецептов.
+RECIPE_BACKGROUND_WORKERS = int(
+    os.getenv("RECIPE_BACKGROUND_WORKERS", default=2)
+)
+
+# Лента подписок: рецепты авторов, у которых подписчиков больше
+# FEED_FANOUT_MAX_FOLLOWERS, не раскладываются по лентам при публикации,
+# а подмешиваются при чтении.
+FEED_FANOUT_MAX_FOLLOWERS = int(
+    os.getenv("FEED_FANOUT_MAX_FOLLOWERS", default=5000)
+)
+FEED_FANOUT_BATCH_SIZE = 1000
+FEED_BACKFILL_SIZE = 100
+
+# Период полураспада веса добавления в избранное или корзину
+# для рейтингов рецептов, в часах.
+RECIPE_RANKING_HALF_LIFE = {
+    "popular": 24 * 30,
+    "trending": 24,
+}
+
+# Похожие рецепты: сколько хранить для каждого рецепта, доля рецептов,
+# начиная с которой ингредиент или тег считается слишком частым
+# и не учитывается, и вес тегов относительно ингредиентов.
+SIMILAR_RECIPES_COUNT = 10
+SIMILAR_RECIPES_MAX_DF = 0.1
+SIMILAR_RECIPES_TAG_WEIGHT = 0.5
+
+# Подбор рецептов по продуктам: сколько продуктов можно передать,
+# сколько ингредиентов может не хватать и как часто, в секундах,
+# индекс в памяти процесса может перестраиваться после изменений.
+PANTRY_MAX_INGREDIENTS = 100
+PANTRY_MAX_MISSING = 3
+PANTRY_INDEX_MAX_AGE = 60
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -118,6 +178,11 @@ MEDIA_URL = "http://158.160.10.39:3001/media/"
 # MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+SHOPPING_LIST_FONT = os.getenv(
+    "SHOPPING_LIST_FONT",
+    default="/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -139,6 +204,9 @@ DJOSER = {
     "LOGIN_FIELD": "email",
     "SEND_ACTIVATION_EMAIL": False,
     "HIDE_USERS": False,
+    # Ссылки из писем сброса пароля и почты, без них djoser падает.
+    "PASSWORD_RESET_CONFIRM_URL": "#/password/reset/confirm/{uid}/{token}",
+    "USERNAME_RESET_CONFIRM_URL": "#/email/reset/confirm/{uid}/{token}",
     "SERIALIZERS": {
         "user_create": "users.serializers.UserRegistrationSerializer",
         "user": "users.serializers.CustomUserSerializer",
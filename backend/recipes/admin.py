@@ -1,6 +1,10 @@
 from django.contrib import admin
 
+from .cache import bump_recipe_versions
 from .models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from .pantry import pantry_index
+from .search import update_search_text
+from .shopping_cart import propagate_recipe_change, recipe_amounts
 
 
 class IngredientsRecipeInline(admin.TabularInline):
@@ -29,7 +33,8 @@ class RecipeAdmin(admin.ModelAdmin):
         "pk",
         "name",
         "author",
-        "favorites",
+        "favorites_count",
+        "in_carts_count",
     )
     search_fields = ("author", "name")
     list_filter = ("tags",)
@@ -37,12 +42,15 @@ class RecipeAdmin(admin.ModelAdmin):
     inlines = (IngredientsRecipeInline,)
     empty_value_display = "—"
 
-    def favorites(self, obj):
-        if Favorite.objects.filter(recipe=obj).exists():
-            return Favorite.objects.filter(recipe=obj).count()
-        return 0
-
-    favorites.short_description = "Количество добавлений в избранное"
+    def save_related(self, request, form, formsets, change):
+        old_amounts = recipe_amounts(form.instance.pk)
+        super().save_related(request, form, formsets, change)
+        amounts = recipe_amounts(form.instance.pk)
+        propagate_recipe_change(form.instance, old_amounts, amounts)
+        if old_amounts.keys() != amounts.keys():
+            pantry_index.invalidate()
+        update_search_text([form.instance])
+        bump_recipe_versions(Recipe.objects.filter(pk=form.instance.pk))
 
 
 @admin.register(Favorite)
@@ -0,0 +1,33 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.RECIPE_BACKGROUND_WORKERS,
+    thread_name_prefix="recipes-background",
+)
+
+
+def run(task, *args):
+    close_old_connections()
+    try:
+        task(*args)
+    except Exception:
+        logger.exception(
+            "Фоновая задача %s%r не выполнена", task.__name__, args
+        )
+    finally:
+        close_old_connections()
+
+
+def run_after_commit(task, *args):
+    """
+    Выполнение задачи в фоновом потоке после фиксации текущей
+    транзакции. Запрос не ждет окончания задачи.
+    """
+    transaction.on_commit(lambda: executor.submit(run, task, *args))
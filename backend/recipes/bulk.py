@@ -0,0 +1,29 @@
+from itertools import islice
+
+from django.db import connections
+from django.db.models import Max
+
+
+def bulk_create_with_pks(model, objects, batch_size=None):
+    """
+    bulk_create, после которого у всех объектов заполнены pk.
+
+    Если СУБД не возвращает id вставленных строк (SQLite, MySQL),
+    id назначаются явно, начиная с текущего максимума. Поэтому
+    функцию нужно вызывать внутри транзакции.
+    """
+    manager = model._default_manager
+    connection = connections[manager.db]
+    if not connection.features.can_return_rows_from_bulk_insert:
+        start = manager.aggregate(Max("pk"))["pk__max"] or 0
+        for pk, obj in enumerate(objects, start + 1):
+            obj.pk = pk
+    return manager.bulk_create(objects, batch_size=batch_size)
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
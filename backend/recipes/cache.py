@@ -0,0 +1,78 @@
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+
+def recipe_representation_key(recipe, origin, image_variant):
+    return (
+        f"recipes:representation:{origin}:{image_variant}:"
+        f"{recipe.pk}:{recipe.version}"
+    )
+
+
+def bump_recipe_versions(recipes):
+    """
+    Увеличивает версию рецептов, сбрасывая их закэшированные представления.
+    """
+    recipes.update(version=F("version") + 1)
+
+
+def catalog_key(model):
+    return f"catalog:{model._meta.model_name}"
+
+
+def invalidate_catalog(model):
+    """
+    Сброс заранее отрендеренного справочника (теги, ингредиенты).
+    """
+    cache.delete(catalog_key(model))
+
+
+def recipe_ids_key(user_id, model):
+    return f"recipes:{model._meta.model_name}:{user_id}"
+
+
+def encode_recipe_ids(recipe_ids):
+    """
+    Упаковка id рецептов в отсортированный массив 64-битных чисел.
+    """
+    return array("q", sorted(recipe_ids)).tobytes()
+
+
+def decode_recipe_ids(raw):
+    recipe_ids = array("q")
+    recipe_ids.frombytes(raw)
+    return frozenset(recipe_ids)
+
+
+def get_recipe_ids(user, model):
+    """
+    Множество id рецептов пользователя из избранного или корзины.
+    При промахе кэша множество загружается из БД.
+    """
+    key = recipe_ids_key(user.pk, model)
+    raw = cache.get(key)
+    if raw is not None:
+        return decode_recipe_ids(raw)
+
+    recipe_ids = frozenset(
+        model.objects.filter(user=user).values_list("recipe_id", flat=True)
+    )
+    cache.set(
+        key,
+        encode_recipe_ids(recipe_ids),
+        settings.RECIPE_IDS_CACHE_TIMEOUT,
+    )
+    return recipe_ids
+
+
+def invalidate_recipe_ids(user_id, model):
+    """
+    Сброс закэшированного множества после фиксации транзакции. Множество
+    не дополняется на месте: параллельные запросы одного пользователя
+    могли бы перезаписать изменения друг друга.
+    """
+    transaction.on_commit(lambda: cache.delete(recipe_ids_key(user_id, model)))
@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import Follow, User
+
+from .models import Favorite, Recipe, ShoppingCart
+
+
+# (модель, поле счетчика, модель связей, внешний ключ на модель)
+COUNTERS = (
+    (Recipe, "favorites_count", Favorite, "recipe"),
+    (Recipe, "in_carts_count", ShoppingCart, "recipe"),
+    (User, "recipes_count", Recipe, "author"),
+    (User, "followers_count", Follow, "author"),
+)
+
+
+def increment(model, pk, field, delta=1):
+    """
+    Атомарное изменение счетчика одним UPDATE. Счетчик не опускается
+    ниже нуля, даже если успел разойтись с данными.
+    """
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+
+
+def change_count(model, pk, field, delta):
+    """
+    Изменение счетчика под блокировкой строки. Возвращает значения
+    счетчика до и после изменения.
+    """
+    with transaction.atomic(savepoint=False):
+        before = (
+            model.objects.select_for_update()
+            .values_list(field, flat=True)
+            .get(pk=pk)
+        )
+        increment(model, pk, field, delta)
+    return before, max(before + delta, 0)
+
+
+def count_followers(follow, delta):
+    return change_count(User, follow.author_id, "followers_count", delta)
+
+
+def count_links(instance, delta):
+    """
+    Изменение счетчиков, которые считают объекты модели instance.
+    """
+    for model, field, related, key in COUNTERS:
+        if isinstance(instance, related):
+            increment(model, getattr(instance, f"{key}_id"), field, delta)
+
+
+def actual_count(related, key):
+    return Coalesce(
+        Subquery(
+            related.objects.filter(**{key: OuterRef("pk")})
+            .order_by()
+            .values(key)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def reconcile_counters(check=False):
+    """
+    Сверка счетчиков с данными. Возвращает число расходящихся строк
+    по каждому счетчику; если check не задан, счетчики исправляются.
+    """
+    drift = {}
+    for model, field, related, key in COUNTERS:
+        mismatched = model.objects.annotate(
+            actual=actual_count(related, key)
+        ).exclude(**{field: F("actual")})
+        drift[f"{model._meta.model_name}.{field}"] = mismatched.count()
+        if not check:
+            model.objects.filter(pk__in=mismatched.values("pk")).update(
+                **{field: actual_count(related, key)}
+            )
+    return drift
@@ -0,0 +1,185 @@
+from collections import defaultdict
+from heapq import merge
+
+from django.conf import settings
+from django.db.models import Q
+
+from users.models import Follow, User
+
+from .bulk import batches
+from .models import FeedEntry, Recipe
+from .queries import latest_recipes_per_author
+
+
+def fans_out(author):
+    """
+    Раскладываются ли рецепты автора по лентам подписчиков при
+    публикации. У популярных авторов лента собирается при чтении.
+    """
+    return author.followers_count <= settings.FEED_FANOUT_MAX_FOLLOWERS
+
+
+def insert_entries(entries):
+    for batch in batches(entries, settings.FEED_FANOUT_BATCH_SIZE):
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(recipes, author):
+    """
+    Добавление новых рецептов автора в ленты всех его подписчиков
+    пачками по FEED_FANOUT_BATCH_SIZE записей.
+    """
+    if not recipes or not author.followers_count or not fans_out(author):
+        return
+    follower_ids = Follow.objects.filter(author=author).values_list(
+        "user_id", flat=True
+    )
+    insert_entries(
+        FeedEntry(
+            user_id=user_id,
+            recipe_id=recipe.pk,
+            author_id=author.pk,
+            pub_date=recipe.pub_date,
+        )
+        for user_id in follower_ids.iterator()
+        for recipe in recipes
+    )
+
+
+def backfill(follow):
+    """
+    Последние FEED_BACKFILL_SIZE рецептов автора в ленте нового
+    подписчика.
+    """
+    recipes = Recipe.objects.filter(author_id=follow.author_id).order_by(
+        "-pub_date", "-id"
+    )[: settings.FEED_BACKFILL_SIZE]
+    insert_entries(
+        FeedEntry(
+            user_id=follow.user_id,
+            recipe_id=recipe_id,
+            author_id=follow.author_id,
+            pub_date=pub_date,
+        )
+        for recipe_id, pub_date in recipes.values_list("id", "pub_date")
+    )
+
+
+def drop_author(follow):
+    FeedEntry.objects.filter(
+        user_id=follow.user_id, author_id=follow.author_id
+    ).delete()
+
+
+def follow_added(follow, before, after):
+    """
+    Лента нового подписчика. Если с этой подпиской число подписчиков
+    автора перешло порог, его рецепты убираются из всех лент: дальше
+    они подмешиваются при чтении. before и after - число подписчиков
+    до и после подписки.
+    """
+    limit = settings.FEED_FANOUT_MAX_FOLLOWERS
+    if before <= limit < after:
+        FeedEntry.objects.filter(author_id=follow.author_id).delete()
+    elif after <= limit:
+        backfill(follow)
+
+
+def follow_removed(follow, before, after):
+    """
+    Удаление автора из ленты бывшего подписчика. Если с этой отпиской
+    число подписчиков автора опустилось до порога, его последние
+    рецепты раскладываются по лентам всех оставшихся подписчиков.
+    """
+    drop_author(follow)
+    if after <= settings.FEED_FANOUT_MAX_FOLLOWERS < before:
+        fill_feeds([follow.author_id])
+
+
+def fill_feeds(author_ids):
+    """
+    Последние FEED_BACKFILL_SIZE рецептов авторов author_ids в лентах
+    их подписчиков.
+    """
+    for authors in batches(author_ids, 500):
+        recipes = defaultdict(list)
+        for recipe_id, author_id, pub_date in Recipe.objects.filter(
+            pk__in=latest_recipes_per_author(
+                authors, settings.FEED_BACKFILL_SIZE
+            )
+        ).values_list("id", "author_id", "pub_date"):
+            recipes[author_id].append((recipe_id, pub_date))
+
+        follows = Follow.objects.filter(author_id__in=authors).values_list(
+            "user_id", "author_id"
+        )
+        insert_entries(
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for user_id, author_id in follows.iterator()
+            for recipe_id, pub_date in recipes[author_id]
+        )
+
+
+def rebuild_feeds():
+    """
+    Пересборка всех лент по подпискам: для каждого автора, чьи
+    рецепты раскладываются по лентам, в ленты подписчиков попадают
+    его последние FEED_BACKFILL_SIZE рецептов.
+    """
+    FeedEntry.objects.all().delete()
+    fill_feeds(
+        User.objects.filter(
+            followers_count__gt=0,
+            followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+        )
+        .values_list("pk", flat=True)
+        .iterator()
+    )
+
+
+def after(position, pk_field):
+    """
+    Условие ключевой пагинации: строки строго после позиции
+    (pub_date, id) в порядке убывания.
+    """
+    pub_date, pk = position
+    return Q(pub_date__lt=pub_date) | Q(
+        pub_date=pub_date, **{f"{pk_field}__lt": pk}
+    )
+
+
+def feed_recipe_ids(user, position, limit):
+    """
+    Id рецептов ленты пользователя после позиции курсора в порядке
+    (pub_date, id) по убыванию. Записи ленты читаются одним проходом
+    по индексу (user, pub_date, recipe), рецепты популярных авторов
+    выбираются отдельным запросом и сливаются с ними.
+    """
+    entries = FeedEntry.objects.filter(user=user)
+    pulled = Recipe.objects.filter(
+        author__following__user=user,
+        author__followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    )
+    if position is not None:
+        entries = entries.filter(after(position, "recipe_id"))
+        pulled = pulled.filter(after(position, "id"))
+
+    entries = entries.order_by("-pub_date", "-recipe_id").values_list(
+        "pub_date", "recipe_id"
+    )[:limit]
+    pulled = pulled.order_by("-pub_date", "-id").values_list(
+        "pub_date", "id"
+    )[:limit]
+
+    recipe_ids = []
+    for _, recipe_id in merge(entries, pulled, reverse=True):
+        if recipe_id not in recipe_ids:
+            recipe_ids.append(recipe_id)
+        if len(recipe_ids) == limit:
+            break
+    return recipe_ids
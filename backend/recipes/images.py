@@ -0,0 +1,88 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import F
+from PIL import Image, ImageOps
+
+from .background import run_after_commit
+from .models import Recipe
+
+
+def variant_name(variant):
+    """
+    Имя, под которым вариант передается хранилищу. Хранилище картинок
+    рецептов оставляет от него каталог и расширение, а сам файл
+    называет по хешу содержимого.
+    """
+    upload_to = Recipe._meta.get_field("image").upload_to
+    return str(PurePosixPath(upload_to) / "variants" / f"{variant}.webp")
+
+
+def render_variant(image, size):
+    """
+    Уменьшенная копия изображения в формате WebP.
+    """
+    copy = image.copy()
+    copy.thumbnail(size, Image.LANCZOS)
+    if copy.mode not in ("RGB", "RGBA"):
+        copy = copy.convert("RGBA" if "A" in copy.getbands() else "RGB")
+    buffer = BytesIO()
+    copy.save(
+        buffer,
+        "WEBP",
+        quality=settings.RECIPE_IMAGE_QUALITY,
+        method=4,
+    )
+    return buffer.getvalue()
+
+
+def generate_variants(recipe_id):
+    """
+    Создание вариантов картинки рецепта: миниатюры для списков,
+    карточки и полноразмерного изображения.
+    Варианты сохраняются, только если картинка рецепта не сменилась
+    за время обработки.
+    """
+    recipe = Recipe.objects.only("image", "image_variants").get(pk=recipe_id)
+    if not recipe.image:
+        return
+    name = recipe.image.name
+    storage = recipe.image.storage
+
+    largest = max(settings.RECIPE_IMAGE_VARIANTS.values())
+    with storage.open(name) as f:
+        image = Image.open(f)
+        # JPEG декодируется сразу в уменьшенном масштабе, чтобы память
+        # не зависела от разрешения исходника.
+        image.draft("RGB", largest)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    variants = {"source": name}
+    for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        variants[variant] = storage.save(
+            variant_name(variant),
+            ContentFile(render_variant(image, size)),
+        )
+
+    Recipe.objects.filter(pk=recipe_id, image=name).update(
+        image_variants=variants, version=F("version") + 1
+    )
+
+
+def needs_variants(recipe):
+    return bool(recipe.image) and (
+        recipe.image_variants.get("source") != recipe.image.name
+    )
+
+
+def schedule_variants(recipes):
+    """
+    Постановка картинок рецептов в очередь обработки после фиксации
+    транзакции. Запрос не ждет окончания обработки.
+    """
+    for recipe in recipes:
+        if needs_variants(recipe):
+            run_after_commit(generate_variants, recipe.pk)
@@ -0,0 +1,136 @@
+from bisect import bisect_left, bisect_right
+from threading import Lock
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Ingredient
+from .search import normalize
+
+
+VERSION_KEY = "recipes:ingredient_index:version"
+
+
+def prefix_range(keys, prefix):
+    """
+    Границы отсортированного списка, внутри которых ключи
+    начинаются с prefix.
+    """
+    start = bisect_left(keys, prefix)
+    end = bisect_left(keys, prefix + "\U0010ffff", start)
+    return start, end
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса для автодополнения.
+
+    Строится лениво при первом поиске и перестраивается, когда
+    меняется версия индекса в общем кэше.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.version = None
+        self.snapshot = None
+
+    def invalidate(self):
+        """
+        Смена версии после фиксации транзакции, чтобы индекс
+        не перестроился по незафиксированным ингредиентам.
+        """
+        transaction.on_commit(
+            lambda: cache.set(VERSION_KEY, uuid4().hex, None)
+        )
+
+    def build(self, version):
+        ingredients = sorted(
+            Ingredient.objects.all(),
+            key=lambda ingredient: (
+                normalize(ingredient.name),
+                ingredient.measurement_unit,
+            ),
+        )
+        names = [normalize(ingredient.name) for ingredient in ingredients]
+
+        words = []
+        for position, name in enumerate(names):
+            start = name.find(" ")
+            while start != -1:
+                words.append((name[start + 1:], position))
+                start = name.find(" ", start + 1)
+        words.sort()
+
+        offsets = []
+        offset = 0
+        for name in names:
+            offsets.append(offset)
+            offset += len(name) + 1
+
+        # Снимок заменяется одним присваиванием, чтобы параллельные
+        # запросы не видели наполовину перестроенный индекс.
+        self.snapshot = (
+            tuple(ingredients),
+            tuple(names),
+            "\n".join(names),
+            tuple(offsets),
+            tuple(word for word, _ in words),
+            tuple(position for _, position in words),
+        )
+        self.version = version
+
+    def ensure_fresh(self):
+        version = cache.get(VERSION_KEY)
+        if self.snapshot is not None and version == self.version:
+            return self.snapshot
+        with self.lock:
+            if self.snapshot is None or version != self.version:
+                self.build(version)
+        return self.snapshot
+
+    def search(self, query):
+        """
+        Ингредиенты, подходящие под запрос: сначала начинающиеся
+        с запроса, затем со словом, начинающимся с запроса, затем
+        содержащие запрос. Внутри группы — по алфавиту.
+        """
+        query = normalize(query)
+        (
+            ingredients,
+            names,
+            text,
+            offsets,
+            word_keys,
+            word_positions,
+        ) = self.ensure_fresh()
+        if not query:
+            return list(ingredients)
+
+        start, end = prefix_range(names, query)
+        prefix = list(range(start, end))
+        found = set(prefix)
+
+        start, end = prefix_range(word_keys, query)
+        word_start = sorted(
+            {word_positions[i] for i in range(start, end)} - found
+        )
+        found.update(word_start)
+
+        substring = []
+        index = text.find(query)
+        while index != -1:
+            position = bisect_right(offsets, index) - 1
+            if position not in found:
+                substring.append(position)
+            if position + 1 == len(offsets):
+                break
+            index = text.find(query, offsets[position + 1])
+
+        return [
+            ingredients[position]
+            for position in prefix + word_start + substring
+        ]
+
+
+ingredient_index = IngredientIndex()
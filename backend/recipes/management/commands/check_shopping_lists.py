@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import ShoppingCart, ShoppingCartIngredient
+from recipes.shopping_cart import (
+    live_shopping_list,
+    rebuild_shopping_list,
+    stored_shopping_list,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверка списков покупок с содержимым корзин "
+        "и пересборка расходящихся списков."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только проверить, не исправляя расхождения.",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = set(
+            ShoppingCart.objects.values_list("user_id", flat=True)
+        ) | set(
+            ShoppingCartIngredient.objects.values_list("user_id", flat=True)
+        )
+
+        mismatched = 0
+        for user_id in sorted(user_ids):
+            totals = live_shopping_list(user_id)
+            if totals == stored_shopping_list(user_id):
+                continue
+            mismatched += 1
+            if not options["check"]:
+                rebuild_shopping_list(user_id, totals)
+
+        if options["check"] and mismatched:
+            raise CommandError(
+                f"Списков покупок с расхождениями: {mismatched}."
+            )
+        self.stdout.write(
+            f"Проверено списков покупок: {len(user_ids)}, "
+            f"пересобрано: {mismatched}."
+        )
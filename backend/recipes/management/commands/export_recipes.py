@@ -0,0 +1,120 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredients,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Follow, User
+
+
+CHUNK_SIZE = 2000
+
+# (тип записи, queryset, поля) в порядке, в котором записи должны
+# загружаться: сначала те, на которые ссылаются остальные.
+RECORDS = (
+    (
+        "user",
+        User.objects.order_by("pk"),
+        ("username", "email", "first_name", "last_name", "password"),
+    ),
+    ("tag", Tag.objects.order_by("pk"), ("name", "color", "slug")),
+    (
+        "ingredient",
+        Ingredient.objects.order_by("pk"),
+        ("name", "measurement_unit"),
+    ),
+    (
+        "recipe",
+        Recipe.objects.order_by("pk"),
+        (
+            "id",
+            "author__username",
+            "name",
+            "image",
+            "text",
+            "cooking_time",
+            "pub_date",
+            "search_text",
+        ),
+    ),
+    (
+        "recipe_ingredient",
+        RecipeIngredients.objects.order_by("pk"),
+        (
+            "recipe_id",
+            "ingredient__name",
+            "ingredient__measurement_unit",
+            "amount",
+        ),
+    ),
+    (
+        "recipe_tag",
+        Recipe.tags.through.objects.order_by("pk"),
+        ("recipe_id", "tag__slug"),
+    ),
+    (
+        "favorite",
+        Favorite.objects.order_by("pk"),
+        ("user__username", "recipe_id"),
+    ),
+    (
+        "shopping_cart",
+        ShoppingCart.objects.order_by("pk"),
+        ("user__username", "recipe_id"),
+    ),
+    (
+        "follow",
+        Follow.objects.order_by("pk"),
+        ("user__username", "author__username"),
+    ),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгрузка пользователей, тегов, ингредиентов, рецептов, избранного, "
+        "корзин и подписок в JSONL: по одной записи на строку."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            "-o",
+            help="Файл для выгрузки, по умолчанию — стандартный вывод.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Число строк, читаемых из БД за один раз.",
+        )
+
+    def handle(self, *args, **options):
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                counts = self.export(f, options["chunk_size"])
+        else:
+            counts = self.export(sys.stdout, options["chunk_size"])
+
+        self.stderr.write(
+            "Выгружено: "
+            + ", ".join(f"{kind} — {count}" for kind, count in counts.items())
+        )
+
+    def export(self, stream, chunk_size):
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        counts = {}
+        for kind, queryset, fields in RECORDS:
+            counts[kind] = 0
+            for row in queryset.values(*fields).iterator(chunk_size):
+                row["type"] = kind
+                stream.write(encoder.encode(row) + "\n")
+                counts[kind] += 1
+        return counts
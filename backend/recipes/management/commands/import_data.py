@@ -1,29 +1,141 @@
 import csv
+import hashlib
+import json
+import re
 from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from foodgram.settings import BASE_DIR
 
-from recipes.models import Ingredient
+from recipes.bulk import batches
+from recipes.cache import invalidate_catalog
+from recipes.ingredient_index import ingredient_index
+from recipes.models import DataImport, Ingredient
 
 
 PATH_TO_DATA = Path(BASE_DIR).resolve().joinpath("data") / "ingredients.csv"
+BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+HEADER = ["name", "measurement_unit"]
+SEPARATORS = re.compile(r"[\s,]*")
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_csv(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        for number, row in enumerate(csv.reader(f)):
+            if not row or (number == 0 and row == HEADER):
+                continue
+            yield row[0], row[1]
+
+
+def read_json(path):
+    """
+    Потоковое чтение JSON-массива объектов: файл читается кусками,
+    объекты разбираются по одному.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buffer = f.read(CHUNK_SIZE).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError("Ожидается JSON-массив.")
+        position = 1
+        while True:
+            position = SEPARATORS.match(buffer, position).end()
+            if buffer.startswith("]", position):
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    raise
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield item["name"], item["measurement_unit"]
+
+
+READERS = {".csv": read_csv, ".json": read_json}
 
 
 class Command(BaseCommand):
-    help = "Команда парсинга данных из .csv файла в БД."
+    help = (
+        "Команда загрузки ингредиентов из .csv или .json файла в БД. "
+        "Файл, который уже был загружен без изменений, пропускается."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default=PATH_TO_DATA,
+            type=Path,
+            help="Путь к файлу с ингредиентами (.csv или .json).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Число строк в одном INSERT.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Загрузить файл, даже если он не менялся.",
+        )
 
     def handle(self, *args, **options):
+        path = options["path"].resolve()
+        reader = READERS.get(path.suffix.lower())
+        if reader is None:
+            raise CommandError(f"Неподдерживаемый формат файла: {path.name}")
+
         try:
-            with open(PATH_TO_DATA, encoding="utf-8") as f:
-                reader = csv.reader(f)
-                next(reader)
+            checksum = file_checksum(path)
+        except OSError as e:
+            raise CommandError(f"Парсинг завершился ошибкой: \n {e}")
 
-                for row in reader:
-                    status, created = Ingredient.objects.update_or_create(
-                        name=row[0], measurement_unit=row[1]
+        source = str(path)
+        if not options["force"] and DataImport.objects.filter(
+            source=source, checksum=checksum
+        ).exists():
+            self.stdout.write("Файл не изменился, загрузка пропущена.")
+            return
+
+        total = 0
+        try:
+            with transaction.atomic():
+                before = Ingredient.objects.count()
+                for batch in batches(reader(path), options["batch_size"]):
+                    Ingredient.objects.bulk_create(
+                        (
+                            Ingredient(name=name, measurement_unit=unit)
+                            for name, unit in batch
+                        ),
+                        ignore_conflicts=True,
                     )
-            print("Парсинг успешно завершен.")
+                    total += len(batch)
+                inserted = Ingredient.objects.count() - before
+                DataImport.objects.update_or_create(
+                    source=source, defaults={"checksum": checksum}
+                )
+        except (OSError, ValueError, KeyError, IndexError) as e:
+            raise CommandError(f"Парсинг завершился ошибкой: \n {e}")
+
+        if inserted:
+            invalidate_catalog(Ingredient)
+            ingredient_index.invalidate()
 
-        except Exception as e:
-            print(f"Парсинг завершился ошибкой: \n {e}")
+        self.stdout.write(
+            f"Парсинг успешно завершен. Добавлено: {inserted}, "
+            f"пропущено: {total - inserted}."
+        )
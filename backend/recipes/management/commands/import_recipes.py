@@ -0,0 +1,248 @@
+import json
+import sys
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from recipes.bulk import batches, bulk_create_with_pks
+from recipes.cache import invalidate_catalog
+from recipes.counters import reconcile_counters
+from recipes.feed import rebuild_feeds
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredients,
+    ShoppingCart,
+    Tag,
+)
+from recipes.pantry import pantry_index
+from recipes.shopping_cart import rebuild_shopping_lists
+from recipes.similarity import rebuild_similar_recipes
+from users.models import Follow, User
+
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        "Загрузка выгрузки export_recipes. Пользователи, теги и ингредиенты "
+        "сопоставляются по username, slug и названию с единицей измерения, "
+        "рецепты получают новые id."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help="Файл JSONL или «-» для стандартного ввода."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Число записей в одном INSERT.",
+        )
+
+    def handle(self, *args, **options):
+        self.users = {}
+        self.tags = {}
+        self.ingredients = {}
+        self.recipes = {}
+        self.cart_users = set()
+        self.loaded = Counter()
+        self.skipped = Counter()
+
+        try:
+            if options["path"] == "-":
+                self.load(sys.stdin, options["batch_size"])
+            else:
+                with open(options["path"], encoding="utf-8") as f:
+                    self.load(f, options["batch_size"])
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Загрузка завершилась ошибкой: \n {e}")
+
+        invalidate_catalog(Tag)
+        invalidate_catalog(Ingredient)
+        ingredient_index.invalidate()
+
+        self.stdout.write(
+            "Загружено: "
+            + ", ".join(
+                f"{kind} — {count}" for kind, count in self.loaded.items()
+            )
+        )
+        if self.skipped:
+            self.stdout.write(
+                "Пропущено из-за отсутствующих ссылок: "
+                + ", ".join(
+                    f"{kind} — {count}"
+                    for kind, count in self.skipped.items()
+                )
+            )
+
+    @transaction.atomic
+    def load(self, stream, batch_size):
+        """
+        Записи читаются построчно и загружаются пачками одного типа,
+        в памяти держатся только текущая пачка и соответствия id.
+        """
+        kind, batch = None, []
+        for line in stream:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            row_kind = row.pop("type")
+            if row_kind != kind or len(batch) >= batch_size:
+                self.flush(kind, batch)
+                kind, batch = row_kind, []
+            batch.append(row)
+        self.flush(kind, batch)
+
+        for user_ids in batches(self.cart_users, batch_size):
+            rebuild_shopping_lists(user_ids)
+        reconcile_counters()
+        rebuild_feeds()
+        rebuild_similar_recipes()
+        pantry_index.invalidate()
+
+    def flush(self, kind, rows):
+        if not rows:
+            return
+        loader = getattr(self, f"load_{kind}", None)
+        if loader is None:
+            raise ValueError(f"Неизвестный тип записи: {kind}")
+        objects = loader(rows)
+        self.loaded[kind] += len(objects)
+        self.skipped[kind] += len(rows) - len(objects)
+
+    def load_user(self, rows):
+        User.objects.bulk_create(
+            (User(**row) for row in rows), ignore_conflicts=True
+        )
+        self.users.update(
+            User.objects.filter(
+                username__in=[row["username"] for row in rows]
+            ).values_list("username", "id")
+        )
+        return rows
+
+    def load_tag(self, rows):
+        Tag.objects.bulk_create(
+            (Tag(**row) for row in rows), ignore_conflicts=True
+        )
+        self.tags.update(
+            Tag.objects.filter(
+                slug__in=[row["slug"] for row in rows]
+            ).values_list("slug", "id")
+        )
+        return rows
+
+    def load_ingredient(self, rows):
+        Ingredient.objects.bulk_create(
+            (Ingredient(**row) for row in rows), ignore_conflicts=True
+        )
+        keys = {(row["name"], row["measurement_unit"]) for row in rows}
+        for name, unit, pk in Ingredient.objects.filter(
+            name__in=[name for name, _ in keys]
+        ).values_list("name", "measurement_unit", "id"):
+            if (name, unit) in keys:
+                self.ingredients[name, unit] = pk
+        return rows
+
+    def load_recipe(self, rows):
+        rows = [row for row in rows if row["author__username"] in self.users]
+        recipes = [
+            Recipe(
+                author_id=self.users[row["author__username"]],
+                name=row["name"],
+                image=row["image"] or None,
+                text=row["text"],
+                cooking_time=row["cooking_time"],
+                search_text=row["search_text"],
+            )
+            for row in rows
+        ]
+        bulk_create_with_pks(Recipe, recipes)
+
+        # auto_now_add перезаписывает дату при вставке, поэтому исходная
+        # дата публикации восстанавливается отдельным UPDATE на пачку.
+        for row, recipe in zip(rows, recipes):
+            recipe.pub_date = parse_datetime(row["pub_date"])
+            self.recipes[row["id"]] = recipe.pk
+        Recipe.objects.bulk_update(recipes, ("pub_date",))
+        return recipes
+
+    def load_recipe_ingredient(self, rows):
+        return RecipeIngredients.objects.bulk_create(
+            (
+                RecipeIngredients(
+                    recipe_id=self.recipes[row["recipe_id"]],
+                    ingredient_id=self.ingredients[
+                        row["ingredient__name"],
+                        row["ingredient__measurement_unit"],
+                    ],
+                    amount=row["amount"],
+                )
+                for row in rows
+                if row["recipe_id"] in self.recipes
+                and (
+                    row["ingredient__name"],
+                    row["ingredient__measurement_unit"],
+                )
+                in self.ingredients
+            ),
+            ignore_conflicts=True,
+        )
+
+    def load_recipe_tag(self, rows):
+        return Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(
+                    recipe_id=self.recipes[row["recipe_id"]],
+                    tag_id=self.tags[row["tag__slug"]],
+                )
+                for row in rows
+                if row["recipe_id"] in self.recipes
+                and row["tag__slug"] in self.tags
+            ),
+            ignore_conflicts=True,
+        )
+
+    def load_user_recipes(self, model, rows):
+        return model.objects.bulk_create(
+            (
+                model(
+                    user_id=self.users[row["user__username"]],
+                    recipe_id=self.recipes[row["recipe_id"]],
+                )
+                for row in rows
+                if row["user__username"] in self.users
+                and row["recipe_id"] in self.recipes
+            ),
+            ignore_conflicts=True,
+        )
+
+    def load_favorite(self, rows):
+        return self.load_user_recipes(Favorite, rows)
+
+    def load_shopping_cart(self, rows):
+        carts = self.load_user_recipes(ShoppingCart, rows)
+        self.cart_users.update(cart.user_id for cart in carts)
+        return carts
+
+    def load_follow(self, rows):
+        return Follow.objects.bulk_create(
+            (
+                Follow(
+                    user_id=self.users[row["user__username"]],
+                    author_id=self.users[row["author__username"]],
+                )
+                for row in rows
+                if row["user__username"] in self.users
+                and row["author__username"] in self.users
+            ),
+            ignore_conflicts=True,
+        )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import generate_variants, needs_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        "Создание вариантов картинок для рецептов, у которых их нет "
+        "или которые сменили картинку."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересоздать варианты для всех рецептов.",
+        )
+
+    def handle(self, *args, **options):
+        recipes = (
+            Recipe.objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .only("image", "image_variants")
+            .iterator()
+        )
+        processed = failed = 0
+        for recipe in recipes:
+            if not options["all"] and not needs_variants(recipe):
+                continue
+            try:
+                generate_variants(recipe.pk)
+            except (OSError, ValueError) as e:
+                failed += 1
+                self.stderr.write(f"Рецепт {recipe.pk}: {e}")
+                continue
+            processed += 1
+
+        self.stdout.write(
+            f"Обработано картинок: {processed}, с ошибками: {failed}."
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import RecipeRanking
+from recipes.rankings import rank_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчет рейтингов рецептов по добавлениям в избранное "
+        "и корзину с затуханием по времени. Запускается периодически."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            choices=[kind for kind, _ in RecipeRanking.KINDS],
+            action="append",
+            help="Пересчитать только указанный рейтинг.",
+        )
+
+    def handle(self, *args, **options):
+        kinds = options["kind"] or [kind for kind, _ in RecipeRanking.KINDS]
+        for kind in kinds:
+            count = rank_recipes(kind)
+            self.stdout.write(f"Рейтинг {kind}: {count} рецептов.")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import rebuild_feeds
+from recipes.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересборка лент подписок: последние рецепты авторов "
+        "раскладываются по лентам их подписчиков."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_feeds()
+        self.stdout.write(f"Записей в лентах: {FeedEntry.objects.count()}.")
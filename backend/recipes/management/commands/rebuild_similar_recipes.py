@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import rebuild_similar_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        "Полный пересчет списков похожих рецептов. Запускается после "
+        "импорта или генерации данных и периодически."
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_similar_recipes()
+        self.stdout.write(f"Похожие рецепты пересчитаны для {count} рецептов.")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверка счетчиков избранного, корзин, рецептов и подписчиков "
+        "с данными и исправление расхождений."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только проверить, не исправляя расхождения.",
+        )
+
+    def handle(self, *args, **options):
+        drift = reconcile_counters(check=options["check"])
+        total = sum(drift.values())
+
+        if options["check"] and total:
+            raise CommandError(
+                "Счетчики с расхождениями: "
+                + ", ".join(
+                    f"{counter} — {count}"
+                    for counter, count in drift.items()
+                    if count
+                )
+            )
+        self.stdout.write(f"Исправлено счетчиков: {total}.")
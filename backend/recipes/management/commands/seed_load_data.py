@@ -0,0 +1,294 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.bulk import batches, bulk_create_with_pks
+from recipes.counters import reconcile_counters
+from recipes.feed import rebuild_feeds
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredients,
+    ShoppingCart,
+    Tag,
+)
+from recipes.search import normalize
+from recipes.pantry import pantry_index
+from recipes.shopping_cart import rebuild_shopping_lists
+from recipes.similarity import rebuild_similar_recipes
+from users.models import Follow, User
+
+
+TAGS = (
+    ("Завтрак", "#E26C2D", "breakfast"),
+    ("Обед", "#49B64E", "lunch"),
+    ("Ужин", "#8775D2", "dinner"),
+    ("Десерт", "#F5A623", "dessert"),
+    ("Выпечка", "#D0021B", "bakery"),
+    ("Салат", "#7ED321", "salad"),
+    ("Суп", "#4A90E2", "soup"),
+    ("Напиток", "#50E3C2", "drink"),
+)
+PASSWORD = "Foodgram-2022"
+STEPS = (
+    "Нарезать {}.",
+    "Смешать {} и {}.",
+    "Обжарить {} до золотистой корочки.",
+    "Добавить {} и тушить 10 минут.",
+    "Посыпать {} и подавать.",
+)
+
+
+class ZipfSampler:
+    """
+    Выбор элементов с вероятностью, обратно пропорциональной
+    степени их ранга: немногие элементы популярны, остальные редки.
+    Ранги назначаются случайной перестановкой.
+    """
+
+    def __init__(self, rnd, items, exponent):
+        self.rnd = rnd
+        self.items = list(items)
+        rnd.shuffle(self.items)
+        self.cum_weights = list(
+            accumulate(
+                1 / rank**exponent for rank in range(1, len(self.items) + 1)
+            )
+        )
+
+    def sample(self, k, attempts=10):
+        """
+        До k различных элементов; у популярных больше шансов попасть
+        в выборку.
+        """
+        k = min(k, len(self.items))
+        chosen = {}
+        for _ in range(attempts):
+            if len(chosen) >= k:
+                break
+            chosen.update(
+                dict.fromkeys(
+                    self.rnd.choices(
+                        self.items,
+                        cum_weights=self.cum_weights,
+                        k=k - len(chosen),
+                    )
+                )
+            )
+        return list(chosen)
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерация нагрузочных данных: пользователи, рецепты с неравномерным "
+        "распределением ингредиентов и тегов, избранное, корзины и подписки "
+        "со степенным распределением. Данные детерминированы значением --seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument(
+            "--favorites",
+            type=int,
+            default=20,
+            help="Среднее число рецептов в избранном.",
+        )
+        parser.add_argument(
+            "--carts",
+            type=int,
+            default=5,
+            help="Среднее число рецептов в корзине.",
+        )
+        parser.add_argument(
+            "--follows",
+            type=int,
+            default=10,
+            help="Среднее число подписок пользователя.",
+        )
+        parser.add_argument("--seed", type=int, default=2022)
+        parser.add_argument(
+            "--prefix",
+            default="load",
+            help="Префикс имен создаваемых пользователей.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.rnd = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.counts = {}
+        started = time.monotonic()
+
+        ingredients = dict(Ingredient.objects.values_list("id", "name"))
+        if not ingredients:
+            raise CommandError(
+                "Справочник ингредиентов пуст, сначала выполните import_data."
+            )
+        if User.objects.filter(
+            username__startswith=options["prefix"]
+        ).exists():
+            raise CommandError(
+                f"Пользователи с префиксом «{options['prefix']}» уже есть, "
+                "укажите другой --prefix."
+            )
+
+        with transaction.atomic():
+            user_ids = self.create_users(options["users"], options["prefix"])
+            recipe_ids = self.create_recipes(
+                options["recipes"], user_ids, ingredients, self.create_tags()
+            )
+            popular = ZipfSampler(self.rnd, recipe_ids, 1.1)
+            self.create_edges(
+                Favorite, user_ids, popular, options["favorites"]
+            )
+            self.create_edges(
+                ShoppingCart, user_ids, popular, options["carts"]
+            )
+            self.create_follows(user_ids, options["follows"])
+            for batch in batches(user_ids, self.batch_size):
+                rebuild_shopping_lists(batch)
+            reconcile_counters()
+            rebuild_feeds()
+            rebuild_similar_recipes()
+            pantry_index.invalidate()
+
+        self.stdout.write(
+            ", ".join(
+                f"{name}: {count}" for name, count in self.counts.items()
+            )
+            + f". Время: {time.monotonic() - started:.1f} с."
+        )
+
+    def power_law_count(self, mean, limit):
+        """
+        Число связей пользователя: распределение Парето со средним mean.
+        """
+        alpha = 1.5
+        value = mean * (alpha - 1) / alpha * self.rnd.paretovariate(alpha)
+        return min(int(value), limit)
+
+    def create_tags(self):
+        Tag.objects.bulk_create(
+            (
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in TAGS
+            ),
+            ignore_conflicts=True,
+        )
+        return list(Tag.objects.order_by("pk").values_list("pk", flat=True))
+
+    def create_users(self, count, prefix):
+        password = make_password(PASSWORD)
+        users = [
+            User(
+                username=f"{prefix}{i}",
+                email=f"{prefix}{i}@foodgram.ru",
+                first_name="Повар",
+                last_name=str(i),
+                password=password,
+            )
+            for i in range(count)
+        ]
+        bulk_create_with_pks(User, users, self.batch_size)
+        self.counts["Пользователи"] = count
+        return [user.pk for user in users]
+
+    def create_recipes(self, count, user_ids, ingredients, tag_ids):
+        authors = ZipfSampler(self.rnd, user_ids, 1.2)
+        popular_ingredients = ZipfSampler(self.rnd, ingredients, 0.9)
+        popular_tags = ZipfSampler(self.rnd, tag_ids, 1.0)
+        now = timezone.now()
+        recipe_ids = []
+        links = tags = 0
+
+        for batch in batches(range(count), self.batch_size):
+            recipes, recipe_ingredients, recipe_tags = [], [], []
+            for number in batch:
+                chosen = popular_ingredients.sample(self.rnd.randint(3, 15))
+                names = [ingredients[pk] for pk in chosen]
+                name = f"{names[0].capitalize()} по-домашнему №{number}"
+                text = " ".join(
+                    step.format(*self.rnd.choices(names, k=step.count("{}")))
+                    for step in self.rnd.sample(STEPS, self.rnd.randint(2, 5))
+                )
+                recipe = Recipe(
+                    author_id=authors.sample(1)[0],
+                    name=name,
+                    text=text,
+                    cooking_time=self.rnd.randint(5, 180),
+                    search_text=normalize(" ".join((name, text, *names))),
+                )
+                recipe.pub_date = now - timedelta(
+                    minutes=self.rnd.randint(0, 365 * 24 * 60)
+                )
+                recipes.append(recipe)
+                recipe_ingredients.append(chosen)
+                recipe_tags.append(popular_tags.sample(self.rnd.randint(1, 3)))
+
+            pub_dates = [recipe.pub_date for recipe in recipes]
+            bulk_create_with_pks(Recipe, recipes)
+            # auto_now_add перезаписывает дату при вставке.
+            for recipe, pub_date in zip(recipes, pub_dates):
+                recipe.pub_date = pub_date
+            Recipe.objects.bulk_update(recipes, ("pub_date",))
+
+            links += len(
+                RecipeIngredients.objects.bulk_create(
+                    RecipeIngredients(
+                        recipe_id=recipe.pk,
+                        ingredient_id=ingredient_id,
+                        amount=self.rnd.randint(1, 500),
+                    )
+                    for recipe, chosen in zip(recipes, recipe_ingredients)
+                    for ingredient_id in chosen
+                )
+            )
+            tags += len(
+                Recipe.tags.through.objects.bulk_create(
+                    Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+                    for recipe, chosen in zip(recipes, recipe_tags)
+                    for tag_id in chosen
+                )
+            )
+            recipe_ids.extend(recipe.pk for recipe in recipes)
+
+        self.counts["Рецепты"] = count
+        self.counts["Ингредиенты в рецептах"] = links
+        self.counts["Теги рецептов"] = tags
+        return recipe_ids
+
+    def create_edges(self, model, user_ids, recipes, mean):
+        rows = (
+            model(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in recipes.sample(
+                self.power_law_count(mean, len(recipes.items))
+            )
+        )
+        total = 0
+        for batch in batches(rows, self.batch_size):
+            total += len(model.objects.bulk_create(batch))
+        self.counts[model._meta.verbose_name_plural] = total
+
+    def create_follows(self, user_ids, mean):
+        authors = ZipfSampler(self.rnd, user_ids, 1.2)
+        rows = (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id in user_ids
+            for author_id in authors.sample(
+                self.power_law_count(mean, len(user_ids))
+            )
+            if author_id != user_id
+        )
+        total = 0
+        for batch in batches(rows, self.batch_size):
+            total += len(Follow.objects.bulk_create(batch))
+        self.counts["Подписки"] = total
@@ -0,0 +1,20 @@
+# Generated by Django 3.2 on 2026-10-18 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0006_recipe_pub_date_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Версия"
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2 on 2026-10-18 01:49
+
+from django.db import migrations, models
+
+
+def fill_search_text(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    for recipe in Recipe.objects.prefetch_related("ingredients"):
+        document = " ".join(
+            (
+                recipe.name,
+                recipe.text,
+                *(ingredient.name for ingredient in recipe.ingredients.all()),
+            )
+        )
+        Recipe.objects.filter(pk=recipe.pk).update(
+            search_text=document.strip().casefold().replace("ё", "е")
+        )
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS recipe_search_text_trgm_idx "
+        "ON recipes_recipe USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS recipe_search_text_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0007_recipe_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="search_text",
+            field=models.TextField(
+                blank=True, editable=False, verbose_name="Поисковый документ"
+            ),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 3.2 on 2026-10-18 01:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_shopping_cart_ingredients(apps, schema_editor):
+    RecipeIngredients = apps.get_model("recipes", "RecipeIngredients")
+    ShoppingCartIngredient = apps.get_model("recipes", "ShoppingCartIngredient")
+    totals = (
+        RecipeIngredients.objects.filter(recipe__shopping_list__isnull=False)
+        .values("recipe__shopping_list__user", "ingredient")
+        .annotate(total=models.Sum("amount"))
+    )
+    ShoppingCartIngredient.objects.bulk_create(
+        (
+            ShoppingCartIngredient(
+                user_id=row["recipe__shopping_list__user"],
+                ingredient_id=row["ingredient"],
+                amount=row["total"],
+            )
+            for row in totals.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0008_recipe_search_text"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShoppingCartIngredient",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.IntegerField(
+                        default=0, verbose_name="Количество ингредиента"
+                    ),
+                ),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shopping_cart_ingredients",
+                        to="recipes.ingredient",
+                        verbose_name="Ингредиент",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shopping_cart_ingredients",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ингредиент в списке покупок",
+                "verbose_name_plural": "Ингредиенты в списке покупок",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="shoppingcartingredient",
+            constraint=models.UniqueConstraint(
+                fields=("user", "ingredient"),
+                name="user_shopping_cart_ingredient_unique",
+            ),
+        ),
+        migrations.RunPython(
+            fill_shopping_cart_ingredients, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2 on 2026-10-18 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0009_shoppingcartingredient"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataImport",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="Файл с данными"
+                    ),
+                ),
+                (
+                    "checksum",
+                    models.CharField(
+                        max_length=64, verbose_name="Контрольная сумма SHA-256"
+                    ),
+                ),
+                (
+                    "imported_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата импорта"),
+                ),
+            ],
+            options={
+                "verbose_name": "Импорт данных",
+                "verbose_name_plural": "Импорты данных",
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-18 02:12
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0011_recipe_image_variants"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="recipe",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=recipes.storage.ContentAddressedStorage(),
+                upload_to="recipes/",
+                verbose_name="Картинка",
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.2 on 2026-10-18 02:17
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    counters = (
+        ("recipes.Recipe", "favorites_count", "recipes.Favorite", "recipe"),
+        ("recipes.Recipe", "in_carts_count", "recipes.ShoppingCart", "recipe"),
+        ("users.User", "recipes_count", "recipes.Recipe", "author"),
+        ("users.User", "followers_count", "users.Follow", "author"),
+    )
+    for model_name, field, related_name, key in counters:
+        related = apps.get_model(related_name)
+        apps.get_model(model_name).objects.update(
+            **{
+                field: Coalesce(
+                    models.Subquery(
+                        related.objects.filter(**{key: models.OuterRef("pk")})
+                        .order_by()
+                        .values(key)
+                        .annotate(total=models.Count("pk"))
+                        .values("total")
+                    ),
+                    0,
+                )
+            }
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0012_recipe_image_storage"),
+        ("users", "0002_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Добавлений в избранное"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="in_carts_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Добавлений в корзину"
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
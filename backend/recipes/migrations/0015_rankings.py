@@ -0,0 +1,87 @@
+# Generated by Django 3.2 on 2026-10-18 02:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0014_feedentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="favorite",
+            name="added_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                verbose_name="Дата добавления",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="shoppingcart",
+            name="added_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                verbose_name="Дата добавления",
+            ),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name="RecipeRanking",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("popular", "Популярные"),
+                            ("trending", "Набирающие популярность"),
+                        ],
+                        max_length=16,
+                        verbose_name="Рейтинг",
+                    ),
+                ),
+                ("position", models.PositiveIntegerField(verbose_name="Позиция")),
+                ("score", models.FloatField(verbose_name="Оценка")),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rankings",
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Позиция в рейтинге",
+                "verbose_name_plural": "Рейтинги рецептов",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="reciperanking",
+            index=models.Index(
+                fields=["kind", "position"], name="recipe_ranking_position_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="reciperanking",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "recipe"), name="recipe_ranking_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 3.2 on 2026-10-18 02:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0015_rankings"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SimilarRecipe",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField(verbose_name="Сходство")),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_recipes",
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "similar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_to",
+                        to="recipes.recipe",
+                        verbose_name="Похожий рецепт",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Похожий рецепт",
+                "verbose_name_plural": "Похожие рецепты",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="similarrecipe",
+            index=models.Index(
+                fields=["recipe", "-score"], name="similar_recipe_score_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="similarrecipe",
+            constraint=models.UniqueConstraint(
+                fields=("recipe", "similar"), name="similar_recipe_unique"
+            ),
+        ),
+    ]
@@ -4,6 +4,10 @@ from django.core.validators import MinValueValidator
 from django.db import models
 from django.db.models import UniqueConstraint
 
+from users.models import CountersModel
+
+from .storage import recipe_image_storage
+
 
 User = get_user_model()
 
@@ -47,7 +51,7 @@ class Tag(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class Recipe(CountersModel):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -58,6 +62,7 @@ class Recipe(models.Model):
     image = models.ImageField(
         blank=True,
         upload_to="recipes/",
+        storage=recipe_image_storage,
         verbose_name="Картинка",
         null=True,
     )
@@ -78,9 +83,35 @@ class Recipe(models.Model):
             )
         ],
     )
+    version = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Версия"
+    )
+    search_text = models.TextField(
+        blank=True, editable=False, verbose_name="Поисковый документ"
+    )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Варианты картинки",
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Добавлений в избранное"
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Добавлений в корзину"
+    )
+
+    # Версия тоже увеличивается только через F().
+    counter_fields = ("favorites_count", "in_carts_count", "version")
 
     class Meta:
         ordering = ("-pub_date",)
+        indexes = [
+            models.Index(
+                fields=("-pub_date", "-id"), name="recipe_pub_date_id_idx"
+            )
+        ]
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
 
@@ -132,6 +163,9 @@ class ShoppingCart(models.Model):
         verbose_name="Рецепт",
         related_name="shopping_list",
     )
+    added_at = models.DateTimeField(
+        auto_now_add=True, verbose_name="Дата добавления"
+    )
 
     class Meta:
         constraints = [
@@ -143,6 +177,34 @@ class ShoppingCart(models.Model):
         verbose_name_plural = "Список покупок"
 
 
+class ShoppingCartIngredient(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name="Пользователь",
+        related_name="shopping_cart_ingredients",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name="Ингредиент",
+        related_name="shopping_cart_ingredients",
+    )
+    amount = models.IntegerField(
+        default=0, verbose_name="Количество ингредиента"
+    )
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=("user", "ingredient"),
+                name="user_shopping_cart_ingredient_unique",
+            )
+        ]
+        verbose_name = "Ингредиент в списке покупок"
+        verbose_name_plural = "Ингредиенты в списке покупок"
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(
         User,
@@ -156,6 +218,9 @@ class Favorite(models.Model):
         verbose_name="Рецепт",
         related_name="favorites",
     )
+    added_at = models.DateTimeField(
+        auto_now_add=True, verbose_name="Дата добавления"
+    )
 
     class Meta:
         constraints = [
@@ -165,3 +230,140 @@ class Favorite(models.Model):
         ]
         verbose_name = "Избранный рецепт"
         verbose_name_plural = "Избранные рецепты"
+
+
+class FeedEntry(models.Model):
+    """
+    Рецепт в ленте подписок пользователя. Записи добавляются при
+    публикации рецепта автором, на которого подписан пользователь.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name="Читатель",
+        related_name="feed_entries",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name="Рецепт",
+        related_name="feed_entries",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name="Автор рецепта",
+        related_name="+",
+    )
+    pub_date = models.DateTimeField(verbose_name="Дата публикации")
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=("user", "recipe"), name="user_feed_entry_unique"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=("user", "-pub_date", "-recipe"),
+                name="feed_entry_user_pub_date_idx",
+            )
+        ]
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+
+
+class RecipeRanking(models.Model):
+    """
+    Позиция рецепта в снимке рейтинга. Снимок пересчитывается
+    командой rank_recipes, списки по рейтингу читают готовые позиции.
+    """
+
+    POPULAR = "popular"
+    TRENDING = "trending"
+    KINDS = (
+        (POPULAR, "Популярные"),
+        (TRENDING, "Набирающие популярность"),
+    )
+
+    kind = models.CharField(
+        max_length=16, choices=KINDS, verbose_name="Рейтинг"
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name="Рецепт",
+        related_name="rankings",
+    )
+    position = models.PositiveIntegerField(verbose_name="Позиция")
+    score = models.FloatField(verbose_name="Оценка")
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=("kind", "recipe"), name="recipe_ranking_unique"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=("kind", "position"),
+                name="recipe_ranking_position_idx",
+            )
+        ]
+        verbose_name = "Позиция в рейтинге"
+        verbose_name_plural = "Рейтинги рецептов"
+
+
+class SimilarRecipe(models.Model):
+    """
+    Рецепт из списка самых похожих на данный по ингредиентам и тегам.
+    Списки пересчитываются вне запросов, API только читает их.
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name="Рецепт",
+        related_name="similar_recipes",
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name="Похожий рецепт",
+        related_name="similar_to",
+    )
+    score = models.FloatField(verbose_name="Сходство")
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=("recipe", "similar"), name="similar_recipe_unique"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=("recipe", "-score"), name="similar_recipe_score_idx"
+            )
+        ]
+        verbose_name = "Похожий рецепт"
+        verbose_name_plural = "Похожие рецепты"
+
+
+class DataImport(models.Model):
+    source = models.CharField(
+        max_length=255, unique=True, verbose_name="Файл с данными"
+    )
+    checksum = models.CharField(
+        max_length=64, verbose_name="Контрольная сумма SHA-256"
+    )
+    imported_at = models.DateTimeField(
+        auto_now=True, verbose_name="Дата импорта"
+    )
+
+    class Meta:
+        verbose_name = "Импорт данных"
+        verbose_name_plural = "Импорты данных"
+
+    def __str__(self):
+        return self.source
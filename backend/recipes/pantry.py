@@ -0,0 +1,258 @@
+import zlib
+from array import array
+from collections import defaultdict
+from threading import Lock
+from time import monotonic
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Recipe, RecipeIngredients
+
+
+VERSION_KEY = "recipes:pantry_index:version"
+
+# Размер куска при поиске n-го установленного бита, байт.
+CHUNK = 4096
+
+
+def popcount(bitmap):
+    # int.bit_count появился только в Python 3.10.
+    if hasattr(bitmap, "bit_count"):
+        return bitmap.bit_count()
+    return bin(bitmap).count("1")
+
+
+def bitmap_bytes(positions, size):
+    buffer = bytearray((size + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return bytes(buffer)
+
+
+def to_bitmap(positions, size):
+    return int.from_bytes(bitmap_bytes(positions, size), "little")
+
+
+def compress(positions, size):
+    """
+    Множество позиций в компактном виде, как в Roaring: если позиций
+    меньше size / 32, битовая карта хранится сжатой zlib, иначе —
+    как есть, числом на size бит. Сжатая карта распаковывается
+    в C-коде, без цикла по позициям.
+    """
+    data = bitmap_bytes(positions, size)
+    if len(positions) * 32 < size:
+        return zlib.compress(data)
+    return int.from_bytes(data, "little")
+
+
+def bitmap(container):
+    if isinstance(container, int):
+        return container
+    return int.from_bytes(zlib.decompress(container), "little")
+
+
+def add(counter, bits):
+    """
+    Прибавление единицы в позициях bits к побитовому счетчику: срез i
+    хранит i-й разряд счетчика во всех позициях сразу.
+    """
+    carry = bits
+    for digit, value in enumerate(counter):
+        if not carry:
+            return
+        counter[digit], carry = value ^ carry, value & carry
+    if carry:
+        counter.append(carry)
+
+
+def equals(counter, value, mask):
+    """
+    Позиции из mask, в которых побитовый счетчик равен value.
+    """
+    if value >> len(counter):
+        return 0
+    for digit, bits in enumerate(counter):
+        mask = mask & bits if value >> digit & 1 else mask & ~bits
+    return mask
+
+
+def nth_bits(bitmap, start, stop):
+    """
+    Позиции установленных битов bitmap с порядковыми номерами
+    от start до stop. Куски без нужных битов пропускаются целиком.
+    """
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    positions = []
+    seen = 0
+    for offset in range(0, len(data), CHUNK):
+        chunk = data[offset:offset + CHUNK]
+        count = popcount(int.from_bytes(chunk, "little"))
+        if seen + count <= start:
+            seen += count
+            continue
+        for index, byte in enumerate(chunk, offset):
+            while byte:
+                low = byte & -byte
+                if seen >= start:
+                    positions.append(index * 8 + low.bit_length() - 1)
+                seen += 1
+                if seen == stop:
+                    return positions
+                byte ^= low
+    return positions
+
+
+class PantryIndex:
+    """
+    Обратный индекс ингредиент -> рецепты в памяти процесса для подбора
+    рецептов по продуктам пользователя.
+
+    Рецепты пронумерованы от новых к старым, множества рецептов
+    хранятся сжатыми. Индекс строится лениво и перестраивается, когда
+    меняется версия в общем кэше, но не чаще раза
+    в PANTRY_INDEX_MAX_AGE секунд.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.version = None
+        self.built_at = None
+        self.snapshot = None
+
+    def invalidate(self):
+        """
+        Смена версии индекса после фиксации текущей транзакции: иначе
+        параллельный запрос мог бы перестроить индекс по еще не
+        зафиксированным данным и запомнить его под новой версией.
+        """
+        transaction.on_commit(
+            lambda: cache.set(VERSION_KEY, uuid4().hex, None)
+        )
+
+    def build(self, version):
+        recipe_ids = array(
+            "Q",
+            Recipe.objects.order_by("-pub_date", "-id").values_list(
+                "id", flat=True
+            ),
+        )
+        positions = {pk: position for position, pk in enumerate(recipe_ids)}
+        postings = defaultdict(lambda: array("I"))
+        sizes = array("H", bytes(2 * len(recipe_ids)))
+        for recipe_id, ingredient_id in (
+            RecipeIngredients.objects.values_list("recipe_id", "ingredient_id")
+            .order_by()
+            .iterator()
+        ):
+            position = positions.get(recipe_id)
+            if position is None:
+                continue
+            postings[ingredient_id].append(position)
+            sizes[position] += 1
+
+        by_size = defaultdict(lambda: array("I"))
+        for position, size in enumerate(sizes):
+            if size:
+                by_size[size].append(position)
+
+        total = len(recipe_ids)
+        # Снимок заменяется одним присваиванием, чтобы параллельные
+        # запросы не видели наполовину перестроенный индекс.
+        self.snapshot = (
+            recipe_ids,
+            {
+                ingredient_id: compress(items, total)
+                for ingredient_id, items in postings.items()
+            },
+            {size: to_bitmap(items, total) for size, items in by_size.items()},
+        )
+        self.version = version
+        self.built_at = monotonic()
+
+    def ensure_fresh(self):
+        version = cache.get(VERSION_KEY)
+        if self.built_at is not None and (
+            version == self.version
+            or monotonic() - self.built_at < settings.PANTRY_INDEX_MAX_AGE
+        ):
+            return self.snapshot
+        with self.lock:
+            if self.built_at is None or version != self.version:
+                self.build(version)
+        return self.snapshot
+
+    def match(self, ingredient_ids, missing=0):
+        """
+        Рецепты, для которых хватает продуктов ingredient_ids или
+        не хватает не больше missing ингредиентов, и хотя бы один
+        ингредиент есть. Возвращает битовые карты групп рецептов:
+        сначала с меньшим числом недостающих ингредиентов, внутри —
+        с большим числом имеющихся; в группе рецепты от новых к старым.
+        Позиции битов — индексы в возвращаемом массиве id рецептов.
+        """
+        recipe_ids, postings, sizes = self.ensure_fresh()
+        known = set(ingredient_ids) & postings.keys()
+        counter = []
+        for ingredient_id in known:
+            add(counter, bitmap(postings[ingredient_id]))
+        found = 0
+        for bits in counter:
+            found |= bits
+
+        matched = {}
+        groups = []
+        for lacking in range(missing + 1):
+            for size in sorted(sizes, reverse=True):
+                have = size - lacking
+                if not 1 <= have <= len(known):
+                    continue
+                if have not in matched:
+                    matched[have] = equals(counter, have, found)
+                bits = matched[have] & sizes[size]
+                if bits:
+                    groups.append(bits)
+        return recipe_ids, groups
+
+
+pantry_index = PantryIndex()
+
+
+class PantryMatches:
+    """
+    Ленивый список рецептов, подобранных по продуктам. Длина — сумма
+    размеров групп, срез выбирает из БД только рецепты страницы, поэтому
+    список можно передавать пагинатору.
+    """
+
+    def __init__(self, queryset, ingredients, missing=0):
+        self.queryset = queryset
+        self.ids, self.groups = pantry_index.match(ingredients, missing)
+        self.counts = [popcount(bits) for bits in self.groups]
+
+    def __len__(self):
+        return sum(self.counts)
+
+    def recipe_ids(self, start, stop):
+        recipe_ids = []
+        for bits, count in zip(self.groups, self.counts):
+            first, last = max(start, 0), min(stop, count)
+            if first < last:
+                recipe_ids.extend(
+                    self.ids[position]
+                    for position in nth_bits(bits, first, last)
+                )
+            start -= count
+            stop -= count
+        return recipe_ids
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start, stop, _ = item.indices(len(self))
+        recipe_ids = self.recipe_ids(start, stop)
+        recipes = self.queryset.in_bulk(recipe_ids)
+        return [recipes[pk] for pk in recipe_ids if pk in recipes]
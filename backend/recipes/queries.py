@@ -0,0 +1,36 @@
+from django.db import connection
+from django.db.models import F, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+
+from .models import Recipe
+
+
+def latest_recipes_per_author(author_ids, limit):
+    """
+    Выражение для фильтра pk__in: id последних limit рецептов каждого
+    из авторов. Рецепты нумеруются ROW_NUMBER() OVER (PARTITION BY
+    author_id) в порядке публикации, отбор идет в той же SQL-команде.
+
+    Django не умеет фильтровать по оконным функциям, поэтому
+    нумерованная выборка оборачивается в подзапрос вручную.
+    """
+    ranked = (
+        Recipe.objects.filter(author_id__in=author_ids)
+        .annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F("author_id"),
+                order_by=(F("pub_date").desc(), F("id").desc()),
+            )
+        )
+        .order_by()
+        .values("id", "position")
+    )
+    sql, params = ranked.query.sql_with_params()
+    quote = connection.ops.quote_name
+    return RawSQL(
+        f"SELECT {quote('id')} FROM ({sql}) ranked "
+        f"WHERE {quote('position')} <= %s",
+        (*params, limit),
+    )
@@ -0,0 +1,82 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, FilteredRelation, Q
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .bulk import batches
+from .models import Favorite, Recipe, RecipeRanking, ShoppingCart
+
+
+# Добавления старше стольких периодов полураспада весят меньше 0.4%
+# и не учитываются.
+HORIZON = 8
+BATCH_SIZE = 5000
+
+
+def decayed_scores(half_life, now):
+    """
+    Оценки рецептов: каждое добавление в избранное или корзину весит
+    0.5 ** (возраст / half_life). Добавления группируются по часам
+    в БД, в Python приходит по строке на рецепт и час.
+    """
+    scores = defaultdict(float)
+    for model in (Favorite, ShoppingCart):
+        rows = (
+            model.objects.filter(added_at__gte=now - half_life * HORIZON)
+            .annotate(hour=TruncHour("added_at"))
+            .values("recipe_id", "hour")
+            .annotate(total=Count("pk"))
+            .values_list("recipe_id", "hour", "total")
+        )
+        for recipe_id, hour, total in rows.iterator():
+            scores[recipe_id] += total * 0.5 ** ((now - hour) / half_life)
+    return scores
+
+
+def rank_recipes(kind, now=None):
+    """
+    Пересчет снимка рейтинга kind. В снимок попадают все рецепты:
+    сначала по убыванию оценки, рецепты с равной оценкой — от новых
+    к старым. Рецепты, созданные после пересчета, получат позиции
+    при следующем запуске.
+    """
+    now = now or timezone.now()
+    half_life = timedelta(hours=settings.RECIPE_RANKING_HALF_LIFE[kind])
+    scores = decayed_scores(half_life, now)
+    recipe_ids = sorted(
+        Recipe.objects.order_by("-pub_date", "-id").values_list(
+            "id", flat=True
+        ),
+        key=lambda pk: -scores.get(pk, 0),
+    )
+
+    with transaction.atomic():
+        RecipeRanking.objects.filter(kind=kind).delete()
+        rankings = (
+            RecipeRanking(
+                kind=kind,
+                recipe_id=recipe_id,
+                position=position,
+                score=scores.get(recipe_id, 0),
+            )
+            for position, recipe_id in enumerate(recipe_ids, 1)
+        )
+        for batch in batches(rankings, BATCH_SIZE):
+            RecipeRanking.objects.bulk_create(batch)
+    return len(recipe_ids)
+
+
+def ranked(queryset, kind):
+    """
+    Рецепты в порядке позиций в снимке рейтинга. Левое соединение идет
+    по уникальному индексу (kind, recipe), без агрегации при чтении.
+    Рецепты, созданные после пересчета, идут в конце от новых
+    к старым.
+    """
+    return queryset.annotate(
+        ranking=FilteredRelation("rankings", condition=Q(rankings__kind=kind))
+    ).order_by(F("ranking__position").asc(nulls_last=True), "-pub_date", "-id")
@@ -0,0 +1,92 @@
+from django.db import connections
+from django.db.models import (
+    Case,
+    FloatField,
+    Func,
+    IntegerField,
+    Lookup,
+    Q,
+    TextField,
+    Value,
+    When,
+)
+
+
+def normalize(value):
+    """
+    Приведение строки к виду для поиска: без учета регистра, «ё» как «е».
+    """
+    return value.strip().casefold().replace("ё", "е")
+
+
+@TextField.register_lookup
+class TrigramWordSimilar(Lookup):
+    """
+    Оператор pg_trgm «%>»: в строке есть слово, похожее на запрос.
+    Использует GIN-индекс с gin_trgm_ops.
+    """
+
+    lookup_name = "trigram_word_similar"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} %%> {rhs}", lhs_params + rhs_params
+
+
+class TrigramWordSimilarity(Func):
+    function = "WORD_SIMILARITY"
+    output_field = FloatField()
+
+    def __init__(self, string, expression, **extra):
+        super().__init__(Value(string), expression, **extra)
+
+
+def build_search_text(recipe, ingredient_names=None):
+    if ingredient_names is None:
+        ingredient_names = recipe.ingredients.values_list("name", flat=True)
+    return normalize(" ".join((recipe.name, recipe.text, *ingredient_names)))
+
+
+def update_search_text(recipes):
+    """
+    Пересчет поискового документа рецептов: название, описание
+    и названия ингредиентов.
+    """
+    for recipe in recipes:
+        recipe.search_text = build_search_text(recipe)
+        type(recipe).objects.filter(pk=recipe.pk).update(
+            search_text=recipe.search_text
+        )
+
+
+def search_recipes(queryset, query):
+    """
+    Поиск рецептов с ранжированием по релевантности.
+
+    В PostgreSQL используется сходство слов по триграммам (pg_trgm),
+    которое допускает опечатки. В остальных СУБД — вхождение всех слов
+    запроса, выше рецепты, название которых начинается с запроса.
+    """
+    query = normalize(query)
+    if not query:
+        return queryset
+
+    if connections[queryset.db].vendor == "postgresql":
+        return queryset.filter(
+            Q(search_text__contains=query)
+            | Q(search_text__trigram_word_similar=query)
+        ).order_by(
+            TrigramWordSimilarity(query, "search_text").desc(), "-pub_date"
+        )
+
+    for word in query.split():
+        queryset = queryset.filter(search_text__contains=word)
+    return queryset.order_by(
+        Case(
+            When(search_text__startswith=query, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ).desc(),
+        "-pub_date",
+    )
@@ -1,15 +1,61 @@
+from django.core.files.uploadedfile import UploadedFile
 from drf_extra_fields.fields import Base64ImageField
+from rest_framework.fields import ImageField
 from rest_framework.serializers import ModelSerializer
 
 from recipes.models import Recipe
 
 
+class ImageVariantField(ImageField):
+    """
+    Ссылка на вариант картинки рецепта нужного размера. Пока варианты
+    не готовы, отдается исходная картинка.
+
+    Вариант задается аргументом variant, а если он не указан —
+    ключом image_variant в контексте сериализатора.
+    """
+
+    def __init__(self, variant=None, **kwargs):
+        self.variant = variant
+        kwargs.setdefault("read_only", True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+
+        variant = self.variant or self.context.get("image_variant", "full")
+        variants = value.instance.image_variants
+        name = value.name
+        if variants.get("source") == name and variant in variants:
+            name = variants[variant]
+
+        url = value.storage.url(name)
+        request = self.context.get("request")
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class RecipeImageField(Base64ImageField):
+    """
+    Картинка рецепта строкой Base64 в JSON или файлом
+    в multipart/form-data. Файл не читается в память целиком:
+    большие загрузки Django пишет во временный файл на диске.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            return ImageField.to_internal_value(self, data)
+        return super().to_internal_value(data)
+
+
 class FavoriteRecipeSerializer(ModelSerializer):
     """
     Сериализатор для работы с избранными рецептами.
     """
 
-    image = Base64ImageField()
+    image = ImageVariantField(variant="thumbnail")
 
     class Meta:
         model = Recipe
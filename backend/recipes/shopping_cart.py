@@ -0,0 +1,154 @@
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+
+from .models import RecipeIngredients, ShoppingCart, ShoppingCartIngredient
+
+
+def recipe_amounts(recipe_id):
+    return dict(
+        RecipeIngredients.objects.filter(recipe_id=recipe_id)
+        .values("ingredient_id")
+        .annotate(total=Sum("amount"))
+        .values_list("ingredient_id", "total")
+    )
+
+
+def negate(amounts):
+    return {
+        ingredient_id: -amount for ingredient_id, amount in amounts.items()
+    }
+
+
+def apply_shopping_list_deltas(user_ids, deltas):
+    """
+    Прибавление приращений количества ингредиентов к спискам покупок
+    пользователей. Строки с нулевым количеством удаляются.
+    """
+    user_ids = list(user_ids)
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items()
+        if delta
+    }
+    if not user_ids or not deltas:
+        return
+
+    with transaction.atomic():
+        added = [
+            ingredient_id
+            for ingredient_id, delta in deltas.items()
+            if delta > 0
+        ]
+        if added:
+            ShoppingCartIngredient.objects.bulk_create(
+                (
+                    ShoppingCartIngredient(
+                        user_id=user_id, ingredient_id=ingredient_id
+                    )
+                    for user_id in user_ids
+                    for ingredient_id in added
+                ),
+                batch_size=1000,
+                ignore_conflicts=True,
+            )
+        items = ShoppingCartIngredient.objects.filter(
+            user_id__in=user_ids, ingredient_id__in=deltas
+        )
+        items.update(
+            amount=F("amount")
+            + Case(
+                *(
+                    When(ingredient_id=ingredient_id, then=Value(delta))
+                    for ingredient_id, delta in deltas.items()
+                ),
+                default=Value(0),
+            )
+        )
+        if len(added) < len(deltas):
+            items.filter(amount__lte=0).delete()
+
+
+def add_to_shopping_list(user, recipe_id):
+    apply_shopping_list_deltas([user.id], recipe_amounts(recipe_id))
+
+
+def remove_from_shopping_list(user_ids, recipe_id):
+    apply_shopping_list_deltas(user_ids, negate(recipe_amounts(recipe_id)))
+
+
+def propagate_recipe_change(recipe, old_amounts, new_amounts):
+    """
+    Перенос изменения ингредиентов рецепта во все списки покупок,
+    в которых он лежит.
+    """
+    deltas = {
+        ingredient_id: new_amounts.get(ingredient_id, 0)
+        - old_amounts.get(ingredient_id, 0)
+        for ingredient_id in old_amounts.keys() | new_amounts.keys()
+    }
+    apply_shopping_list_deltas(
+        ShoppingCart.objects.filter(recipe=recipe).values_list(
+            "user_id", flat=True
+        ),
+        deltas,
+    )
+
+
+def live_shopping_list(user_id):
+    """
+    Список покупок, посчитанный заново по корзине пользователя.
+    """
+    return dict(
+        RecipeIngredients.objects.filter(recipe__shopping_list__user=user_id)
+        .values("ingredient_id")
+        .annotate(total=Sum("amount"))
+        .values_list("ingredient_id", "total")
+    )
+
+
+def stored_shopping_list(user_id):
+    return dict(
+        ShoppingCartIngredient.objects.filter(user_id=user_id).values_list(
+            "ingredient_id", "amount"
+        )
+    )
+
+
+def rebuild_shopping_list(user_id, totals):
+    with transaction.atomic():
+        ShoppingCartIngredient.objects.filter(user_id=user_id).delete()
+        ShoppingCartIngredient.objects.bulk_create(
+            ShoppingCartIngredient(
+                user_id=user_id, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in totals.items()
+            if amount > 0
+        )
+
+
+def rebuild_shopping_lists(user_ids):
+    """
+    Пересборка списков покупок нескольких пользователей одним
+    агрегирующим запросом.
+    """
+    user_ids = list(user_ids)
+    totals = (
+        RecipeIngredients.objects.filter(
+            recipe__shopping_list__user__in=user_ids
+        )
+        .values("recipe__shopping_list__user", "ingredient")
+        .annotate(total=Sum("amount"))
+    )
+    with transaction.atomic():
+        ShoppingCartIngredient.objects.filter(user_id__in=user_ids).delete()
+        ShoppingCartIngredient.objects.bulk_create(
+            (
+                ShoppingCartIngredient(
+                    user_id=row["recipe__shopping_list__user"],
+                    ingredient_id=row["ingredient"],
+                    amount=row["total"],
+                )
+                for row in totals.iterator()
+            ),
+            batch_size=1000,
+        )
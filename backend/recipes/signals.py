@@ -0,0 +1,145 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import Follow
+
+from .cache import (
+    bump_recipe_versions,
+    invalidate_catalog,
+    invalidate_recipe_ids,
+)
+from .counters import count_followers, count_links
+from .feed import fan_out, follow_added, follow_removed
+from .images import schedule_variants
+from .ingredient_index import ingredient_index
+from .models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from .pantry import pantry_index
+from .search import update_search_text
+from .shopping_cart import remove_from_shopping_list
+from .similarity import (
+    schedule_neighbours_refresh,
+    schedule_similar_refresh,
+)
+
+
+User = get_user_model()
+
+AUTHOR_FIELDS = {"email", "username", "first_name", "last_name"}
+
+
+@receiver(post_save, sender=User)
+def bump_author_recipes(sender, instance, created, update_fields, **kwargs):
+    if created:
+        return
+    if update_fields and not AUTHOR_FIELDS & set(update_fields):
+        return
+    bump_recipe_versions(Recipe.objects.filter(author=instance))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def bump_tag_recipes(sender, instance, **kwargs):
+    bump_recipe_versions(Recipe.objects.filter(tags=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def bump_ingredient_recipes(sender, instance, **kwargs):
+    bump_recipe_versions(Recipe.objects.filter(ingredients=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes_search_text(sender, instance, created, **kwargs):
+    if not created:
+        update_search_text(Recipe.objects.filter(ingredients=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    ingredient_index.invalidate()
+
+
+@receiver(post_save, sender=Recipe)
+def add_to_pantry_index(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        pantry_index.invalidate()
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Ingredient)
+def remove_from_pantry_index(sender, **kwargs):
+    pantry_index.invalidate()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_catalogs(sender, **kwargs):
+    invalidate_catalog(sender)
+
+
+@receiver(pre_delete, sender=Recipe)
+def subtract_recipe_from_shopping_lists(sender, instance, **kwargs):
+    remove_from_shopping_list(
+        ShoppingCart.objects.filter(recipe=instance).values_list(
+            "user_id", flat=True
+        ),
+        instance.pk,
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def process_recipe_image(sender, instance, **kwargs):
+    schedule_variants([instance])
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_similar(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_similar_refresh([instance])
+
+
+@receiver(pre_delete, sender=Recipe)
+def refresh_similar_to_deleted(sender, instance, **kwargs):
+    schedule_neighbours_refresh(instance)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Recipe)
+def count_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        count_links(instance, 1)
+        if sender in (Favorite, ShoppingCart):
+            invalidate_recipe_ids(instance.user_id, sender)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Recipe)
+def count_deleted(sender, instance, **kwargs):
+    count_links(instance, -1)
+    if sender in (Favorite, ShoppingCart):
+        invalidate_recipe_ids(instance.user_id, sender)
+
+
+@receiver(post_save, sender=Recipe)
+def push_to_feeds(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        fan_out([instance], instance.author)
+
+
+# Счетчик подписчиков меняется вместе с лентами: обработчикам ленты
+# нужно его значение до и после изменения.
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        follow_added(instance, *count_followers(instance, 1))
+
+
+@receiver(post_delete, sender=Follow)
+def drop_author_from_feed(sender, instance, **kwargs):
+    follow_removed(instance, *count_followers(instance, -1))
@@ -0,0 +1,268 @@
+import math
+from collections import defaultdict
+from heapq import nlargest
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .background import run_after_commit
+from .bulk import batches
+from .models import Recipe, RecipeIngredients, SimilarRecipe
+
+
+BATCH_SIZE = 5000
+WEIGHTS_KEY = "recipes:similar_recipes:weights"
+
+# Пересчеты в фоновых потоках процесса выполняются по очереди.
+refresh_lock = Lock()
+
+RecipeTags = Recipe.tags.through
+
+# Признак рецепта: (вид, id). Ингредиенты и теги — два вида признаков.
+INGREDIENT = "ingredient"
+TAG = "tag"
+
+
+def feature_links(recipe_ids=None):
+    """
+    Пары (рецепт, признак) для указанных рецептов или для всех.
+    """
+    ingredients = RecipeIngredients.objects.values_list(
+        "recipe_id", "ingredient_id"
+    )
+    tags = RecipeTags.objects.values_list("recipe_id", "tag_id")
+    if recipe_ids is not None:
+        ingredients = ingredients.filter(recipe_id__in=recipe_ids)
+        tags = tags.filter(recipe_id__in=recipe_ids)
+    for kind, links in ((INGREDIENT, ingredients), (TAG, tags)):
+        for recipe_id, feature_id in links.iterator():
+            yield recipe_id, (kind, feature_id)
+
+
+def feature_weights():
+    """
+    Вес признака — сглаженный IDF: чем реже ингредиент или тег, тем
+    больше он говорит о сходстве. Признаки, которые встречаются чаще,
+    чем в доле SIMILAR_RECIPES_MAX_DF рецептов, отбрасываются.
+    """
+    total = Recipe.objects.count()
+    counts = (
+        (
+            INGREDIENT,
+            1,
+            RecipeIngredients.objects.values_list("ingredient_id"),
+        ),
+        (
+            TAG,
+            settings.SIMILAR_RECIPES_TAG_WEIGHT,
+            RecipeTags.objects.values_list("tag_id"),
+        ),
+    )
+    weights = {}
+    for kind, factor, links in counts:
+        for feature_id, frequency in links.annotate(
+            frequency=Count("recipe_id", distinct=True)
+        ).order_by():
+            if frequency > settings.SIMILAR_RECIPES_MAX_DF * total:
+                continue
+            idf = math.log((1 + total) / (1 + frequency)) + 1
+            weights[kind, feature_id] = factor * idf
+    return weights
+
+
+def vectorize(links, weights):
+    """
+    Нормированные разреженные векторы рецептов: признак -> вес.
+    Скалярное произведение таких векторов — косинусное сходство.
+    """
+    vectors = defaultdict(dict)
+    for recipe_id, feature in links:
+        if feature in weights:
+            vectors[recipe_id][feature] = weights[feature]
+    for vector in vectors.values():
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        for feature in vector:
+            vector[feature] /= norm
+    return vectors
+
+
+def build_index(vectors):
+    """
+    Обратный индекс: признак -> [(рецепт, вес)]. Сходство считается
+    только для пар с общими признаками, а не для всех пар рецептов.
+    """
+    index = defaultdict(list)
+    for recipe_id, vector in vectors.items():
+        for feature, weight in vector.items():
+            index[feature].append((recipe_id, weight))
+    return index
+
+
+def similarities(vector, index):
+    scores = defaultdict(float)
+    for feature, weight in vector.items():
+        for recipe_id, other_weight in index[feature]:
+            scores[recipe_id] += weight * other_weight
+    return scores
+
+
+def top(recipe_id, scores):
+    """
+    SIMILAR_RECIPES_COUNT самых похожих рецептов, при равном сходстве —
+    с меньшим id.
+    """
+    return nlargest(
+        settings.SIMILAR_RECIPES_COUNT,
+        (
+            (other_id, score)
+            for other_id, score in scores.items()
+            if other_id != recipe_id and score > 0
+        ),
+        key=lambda item: (item[1], -item[0]),
+    )
+
+
+def write_neighbours(neighbours):
+    """
+    Запись списков похожих рецептов: рецепт -> [(похожий, сходство)].
+    """
+    rows = (
+        SimilarRecipe(recipe_id=recipe_id, similar_id=other, score=score)
+        for recipe_id, items in neighbours.items()
+        for other, score in items
+    )
+    for batch in batches(rows, BATCH_SIZE):
+        SimilarRecipe.objects.bulk_create(batch)
+
+
+def cached_weights():
+    """
+    Веса признаков, посчитанные при последнем полном пересчете.
+    Ингредиенты и теги, появившиеся после него, получат вес
+    при следующем полном пересчете.
+    """
+    weights = cache.get(WEIGHTS_KEY)
+    if weights is None:
+        weights = feature_weights()
+        cache.set(WEIGHTS_KEY, weights, None)
+    return weights
+
+
+def rebuild_similar_recipes():
+    """
+    Полный пересчет списков похожих рецептов по всем рецептам.
+    """
+    weights = feature_weights()
+    vectors = vectorize(feature_links(), weights)
+    index = build_index(vectors)
+    with refresh_lock, transaction.atomic():
+        SimilarRecipe.objects.all().delete()
+        write_neighbours(
+            {
+                recipe_id: top(recipe_id, similarities(vector, index))
+                for recipe_id, vector in vectors.items()
+            }
+        )
+    cache.set(WEIGHTS_KEY, weights, None)
+    return len(vectors)
+
+
+def affected_recipes(recipe_ids, vectors):
+    """
+    Рецепты, списки которых могут измениться вместе с recipe_ids:
+    рецепты с общими признаками и те, в чьих списках они уже есть.
+    """
+    ingredient_ids = set()
+    tag_ids = set()
+    for vector in vectors.values():
+        for kind, feature_id in vector:
+            (ingredient_ids if kind == INGREDIENT else tag_ids).add(feature_id)
+
+    affected = set(
+        RecipeIngredients.objects.filter(
+            ingredient_id__in=ingredient_ids
+        ).values_list("recipe_id", flat=True)
+    )
+    affected |= set(
+        RecipeTags.objects.filter(tag_id__in=tag_ids).values_list(
+            "recipe_id", flat=True
+        )
+    )
+    affected |= set(
+        SimilarRecipe.objects.filter(similar_id__in=recipe_ids).values_list(
+            "recipe_id", flat=True
+        )
+    )
+    return affected - set(recipe_ids)
+
+
+def lock_recipes(recipe_ids):
+    """
+    Блокировка строк рецептов до конца транзакции. Пересчеты с общими
+    рецептами в разных процессах выполняются по очереди, и каждый
+    читает списки, уже записанные предыдущим.
+    """
+    list(
+        Recipe.objects.select_for_update()
+        .filter(pk__in=recipe_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def refresh_similar_recipes(recipe_ids):
+    """
+    Пересчет после изменения рецептов recipe_ids: их собственные
+    списки и списки рецептов, в которые они попадают или могут
+    попасть. Сравниваются только эти рецепты.
+    """
+    weights = cached_weights()
+    changed = vectorize(feature_links(recipe_ids), weights)
+    affected = affected_recipes(recipe_ids, changed)
+    vectors = vectorize(feature_links(affected | set(recipe_ids)), weights)
+    index = build_index(vectors)
+
+    with refresh_lock, transaction.atomic():
+        lock_recipes(affected | set(recipe_ids))
+        current = defaultdict(dict)
+        for recipe_id, other, score in SimilarRecipe.objects.filter(
+            Q(recipe_id__in=affected) & ~Q(similar_id__in=recipe_ids)
+        ).values_list("recipe_id", "similar_id", "score"):
+            current[recipe_id][other] = score
+
+        neighbours = {}
+        for recipe_id in recipe_ids:
+            scores = similarities(changed.get(recipe_id, {}), index)
+            neighbours[recipe_id] = top(recipe_id, scores)
+            for other, score in scores.items():
+                if other in affected:
+                    current[other][recipe_id] = score
+        for recipe_id in affected:
+            neighbours[recipe_id] = top(recipe_id, current[recipe_id])
+
+        SimilarRecipe.objects.filter(recipe_id__in=list(neighbours)).delete()
+        write_neighbours(neighbours)
+
+
+def schedule_similar_refresh(recipes):
+    run_after_commit(
+        refresh_similar_recipes, [recipe.pk for recipe in recipes]
+    )
+
+
+def schedule_neighbours_refresh(recipe):
+    """
+    Пересчет списков, в которых был удаляемый рецепт: при удалении
+    он пропадает из них каскадом, и списки становятся короче.
+    Вызывается до удаления, пересчет идет после фиксации.
+    """
+    recipe_ids = list(
+        SimilarRecipe.objects.filter(similar=recipe).values_list(
+            "recipe_id", flat=True
+        )
+    )
+    if recipe_ids:
+        run_after_commit(refresh_similar_recipes, recipe_ids)
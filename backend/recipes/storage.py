@@ -0,0 +1,38 @@
+import hashlib
+from pathlib import PurePosixPath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, в котором имя файла — SHA-256 его содержимого.
+    Одинаковые файлы хранятся один раз, а файл под выданным именем
+    никогда не меняется, поэтому его можно кешировать бессрочно.
+    """
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        path = PurePosixPath(name)
+        digest = digest.hexdigest()
+        return str(
+            path.parent / digest[:2] / f"{digest}{path.suffix.lower()}"
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+recipe_image_storage = ContentAddressedStorage()
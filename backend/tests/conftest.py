@@ -0,0 +1,226 @@
+import csv
+import json
+import random
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.counters import reconcile_counters
+from recipes.feed import rebuild_feeds
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredients,
+    RecipeRanking,
+    ShoppingCart,
+    Tag,
+)
+from recipes.rankings import rank_recipes
+from recipes.search import update_search_text
+from recipes.shopping_cart import (
+    add_to_shopping_list,
+    live_shopping_list,
+    rebuild_shopping_list,
+)
+from recipes.similarity import rebuild_similar_recipes
+from users.models import Follow, User
+
+
+SEED = 2022
+USERS = 40
+RECIPES = 300
+PASSWORD = "Foodgram-2022"
+TAGS = (
+    ("Завтрак", "#E26C2D", "breakfast"),
+    ("Обед", "#49B64E", "lunch"),
+    ("Ужин", "#8775D2", "dinner"),
+    ("Десерт", "#F5A623", "dessert"),
+    ("Выпечка", "#D0021B", "bakery"),
+)
+
+
+def seed_dataset():
+    """
+    Наполнение БД данными, близкими к боевым: ингредиенты из CSV,
+    пользователи, рецепты, избранное, корзины и подписки.
+    """
+    rnd = random.Random(SEED)
+
+    with open(
+        settings.BASE_DIR / "data" / "ingredients.csv", encoding="utf-8"
+    ) as f:
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in csv.reader(f)
+        )
+    if ingredients[0].pk is None:
+        ingredients = list(Ingredient.objects.all())
+
+    tags = [
+        Tag.objects.create(name=name, color=color, slug=slug)
+        for name, color, slug in TAGS
+    ]
+
+    users = [
+        User.objects.create_user(
+            username=f"cook{i}",
+            email=f"cook{i}@foodgram.ru",
+            password=PASSWORD,
+            first_name="Повар",
+            last_name=str(i),
+        )
+        for i in range(USERS)
+    ]
+    staff = User.objects.create_user(
+        username="admin",
+        email="admin@foodgram.ru",
+        password=PASSWORD,
+        is_staff=True,
+    )
+    for user in (*users, staff):
+        Token.objects.create(user=user)
+
+    recipes = Recipe.objects.bulk_create(
+        Recipe(
+            author=users[int(rnd.paretovariate(1.2)) % USERS],
+            name=f"Рецепт {i}",
+            text="Смешать и приготовить. " * rnd.randint(3, 30),
+            cooking_time=rnd.randint(5, 180),
+        )
+        for i in range(RECIPES)
+    )
+    if recipes[0].pk is None:
+        recipes = list(Recipe.objects.order_by("pk"))
+
+    RecipeIngredients.objects.bulk_create(
+        RecipeIngredients(
+            recipe=recipe, ingredient=ingredient, amount=rnd.randint(1, 500)
+        )
+        for recipe in recipes
+        for ingredient in rnd.sample(ingredients, rnd.randint(3, 15))
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe=recipe, tag=tag)
+        for recipe in recipes
+        for tag in rnd.sample(tags, rnd.randint(1, 3))
+    )
+    update_search_text(recipes)
+
+    for model, per_user in ((Favorite, 30), (ShoppingCart, 8)):
+        model.objects.bulk_create(
+            model(user=user, recipe=recipe)
+            for user in users
+            for recipe in rnd.sample(recipes, rnd.randint(0, per_user))
+        )
+    for user in users:
+        rebuild_shopping_list(user.id, live_shopping_list(user.id))
+    Follow.objects.bulk_create(
+        Follow(user=user, author=author)
+        for user in users
+        for author in rnd.sample(users, rnd.randint(0, 15))
+        if author != user
+    )
+    reconcile_counters()
+    rebuild_feeds()
+    for kind, _ in RecipeRanking.KINDS:
+        rank_recipes(kind)
+    rebuild_similar_recipes()
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        seed_dataset()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def users(db):
+    ordinary = User.objects.get(username="cook1")
+    return {
+        "anonymous": None,
+        "user": ordinary,
+        "staff": User.objects.get(username="admin"),
+    }
+
+
+@pytest.fixture
+def ids(users):
+    """
+    Идентификаторы объектов, на которые ссылаются маршруты.
+    """
+    user = users["user"]
+    own = Recipe.objects.filter(author=user).first() or Recipe.objects.create(
+        author=user, name="Свой рецепт", text="Текст", cooking_time=10
+    )
+    favorite = Recipe.objects.filter(favorites__user=user).first()
+    if favorite is None:
+        favorite = Recipe.objects.exclude(author=user).first()
+        Favorite.objects.create(user=user, recipe=favorite)
+    _, created = ShoppingCart.objects.get_or_create(
+        user=user, recipe=favorite
+    )
+    if created:
+        add_to_shopping_list(user, favorite.pk)
+    other = Recipe.objects.exclude(favorites__user=user).exclude(
+        shopping_list__user=user
+    ).first()
+    followed = User.objects.filter(following__user=user).first()
+    if followed is None:
+        followed = User.objects.exclude(pk=user.pk).first()
+        Follow.objects.create(user=user, author=followed)
+    unfollowed = User.objects.exclude(pk=user.pk).exclude(
+        following__user=user
+    ).first()
+    return {
+        "recipe": own.pk,
+        "favorite": favorite.pk,
+        "other": other.pk,
+        "followed": followed.pk,
+        "unfollowed": unfollowed.pk,
+        "ingredients": list(
+            Ingredient.objects.values_list("pk", flat=True)[:12]
+        ),
+        "tags": list(Tag.objects.values_list("pk", flat=True)),
+        "tag_slug": Tag.objects.first().slug,
+    }
+
+
+@pytest.fixture
+def make_client(users):
+    def make(role):
+        client = APIClient()
+        user = users[role]
+        if user is not None:
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Token {user.auth_token.key}"
+            )
+        return client
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def benchmark_report():
+    """
+    Отчёт с числом запросов и временем ответа маршрутов.
+    Сохраняется в JSON для сравнения между коммитами.
+    """
+    results = {}
+    yield results
+    with open(settings.BENCHMARK_REPORT, "w", encoding="utf-8") as f:
+        json.dump(
+            {"database": connection.vendor, "results": results},
+            f,
+            indent=2,
+            sort_keys=True,
+        )
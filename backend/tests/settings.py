@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+from foodgram.settings import *  # noqa: F401,F403
+from foodgram.settings import BASE_DIR
+
+
+# Без DB_ENGINE тесты запускаются на SQLite, иначе — на указанной СУБД.
+if not os.getenv("DB_ENGINE"):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+        }
+    }
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+MEDIA_ROOT = os.path.join(tempfile.gettempdir(), "foodgram_test_media")
+
+BENCHMARK_REPORT = os.getenv(
+    "BENCHMARK_REPORT", default=os.path.join(BASE_DIR, "benchmark.json")
+)
+BENCHMARK_ROUNDS = int(os.getenv("BENCHMARK_ROUNDS", default=5))
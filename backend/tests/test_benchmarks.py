@@ -0,0 +1,332 @@
+import statistics
+import time
+from urllib.parse import urlsplit
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, resolve
+
+
+IMAGE = (
+    "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA"
+    "DUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+ROLES = ("anonymous", "user", "staff")
+
+
+def recipe_payload(ids):
+    return {
+        "ingredients": [
+            {"id": pk, "amount": 10 + i}
+            for i, pk in enumerate(ids["ingredients"])
+        ],
+        "tags": ids["tags"][:2],
+        "image": IMAGE,
+        "name": "Новый рецепт",
+        "text": "Описание нового рецепта",
+        "cooking_time": 15,
+    }
+
+
+def recipe_batch_payload(ids):
+    return [
+        dict(recipe_payload(ids), name=f"Рецепт из пакета {i}")
+        for i in range(20)
+    ]
+
+
+def new_user_payload(ids):
+    return {
+        "email": "new@foodgram.ru",
+        "username": "newcook",
+        "first_name": "Новый",
+        "last_name": "Повар",
+        "password": "Kartoshka-2023",
+    }
+
+
+def user_payload(ids):
+    return {
+        "email": "renamed@foodgram.ru",
+        "username": "renamed",
+        "first_name": "Новое",
+        "last_name": "Имя",
+    }
+
+
+def password_payload(ids):
+    return {
+        "current_password": "Foodgram-2022",
+        "new_password": "Kartoshka-2023",
+    }
+
+
+def current_password_payload(ids):
+    return {"current_password": "Foodgram-2022"}
+
+
+def set_email_payload(ids):
+    return {"current_password": "Foodgram-2022", "new_email": "re@foodgram.ru"}
+
+
+def email_payload(ids):
+    return {"email": "cook1@foodgram.ru"}
+
+
+def confirm_payload(ids):
+    # Ссылка из письма с неверным токеном.
+    return {
+        "uid": "MQ",
+        "token": "invalid",
+        "new_password": "Kartoshka-2023",
+        "new_email": "re@foodgram.ru",
+    }
+
+
+# Ожидаемые статусы ответа для ROLES: анонима, пользователя и админа.
+# У админа нет подписок и корзины, поэтому отписка и действия
+# с корзиной для него — ошибка клиента.
+PUBLIC = (200, 200, 200)
+PUBLIC_CREATE = (201, 201, 201)
+PRIVATE = (401, 200, 200)
+CREATE = (401, 201, 201)
+REMOVE = (401, 204, 204)
+OWN = (401, 200, 400)
+OWN_CREATE = (401, 201, 400)
+OWN_REMOVE = (401, 204, 400)
+STAFF_ONLY = (401, 403, 200)
+STAFF_REMOVE = (401, 403, 204)
+# Активация и сброс пароля и почты доступны без входа: ссылка из письма
+# с неверным токеном — 400 для всех, запрос письма принимается от любого.
+REJECTED = (400, 400, 400)
+ACCEPTED = (204, 204, 204)
+
+# (маршрут, метод, URL, максимум SQL-запросов, статусы, тело запроса)
+ROUTES = (
+    ("ingredients-list", "get", "/api/ingredients/", 3, PUBLIC, None),
+    ("ingredients-search", "get", "/api/ingredients/?name=мо", 3, PUBLIC,
+     None),
+    ("ingredients-detail", "get", "/api/ingredients/{ingredients[0]}/", 3,
+     PUBLIC, None),
+    ("tags-list", "get", "/api/tags/", 3, PUBLIC, None),
+    ("tags-detail", "get", "/api/tags/{tags[0]}/", 3, PUBLIC, None),
+    ("recipes-list", "get", "/api/recipes/", 10, PUBLIC, None),
+    ("recipes-list-limit", "get", "/api/recipes/?limit=50", 10, PUBLIC,
+     None),
+    ("recipes-list-deep", "get", "/api/recipes/?page=40", 10, PUBLIC, None),
+    ("recipes-list-cursor", "get", "/api/recipes/?pagination=cursor", 9,
+     PUBLIC, None),
+    ("recipes-list-filtered", "get",
+     "/api/recipes/?tags={tag_slug}&is_favorited=1&is_in_shopping_cart=1",
+     10, PUBLIC, None),
+    ("recipes-feed", "get", "/api/recipes/feed/", 10, PRIVATE, None),
+    ("recipes-list-popular", "get", "/api/recipes/?ordering=popular", 10,
+     PUBLIC, None),
+    ("recipes-trending", "get", "/api/recipes/trending/", 10, PUBLIC,
+     None),
+    ("recipes-search", "get", "/api/recipes/?search=рецепт мол", 10,
+     PUBLIC, None),
+    ("recipes-detail", "get", "/api/recipes/{recipe}/", 8, PUBLIC, None),
+    ("recipes-similar", "get", "/api/recipes/{recipe}/similar/", 10,
+     PUBLIC, None),
+    ("recipes-pantry", "get",
+     "/api/recipes/pantry/?ingredients={ingredients[0]}"
+     "&ingredients={ingredients[1]}&missing=2", 10, PUBLIC, None),
+    ("recipes-create", "post", "/api/recipes/", 15, CREATE, recipe_payload),
+    ("recipes-batch", "post", "/api/recipes/batch/", 16, CREATE,
+     recipe_batch_payload),
+    ("recipes-update", "patch", "/api/recipes/{recipe}/", 18, PRIVATE,
+     recipe_payload),
+    ("recipes-replace", "put", "/api/recipes/{recipe}/", 18, PRIVATE,
+     recipe_payload),
+    ("recipes-delete", "delete", "/api/recipes/{recipe}/", 18, REMOVE,
+     None),
+    ("recipes-favorite-add", "post", "/api/recipes/{other}/favorite/", 7,
+     CREATE, None),
+    ("recipes-favorite-remove", "delete",
+     "/api/recipes/{favorite}/favorite/", 6, OWN_REMOVE, None),
+    ("recipes-cart-add", "post", "/api/recipes/{other}/shopping_cart/", 14,
+     CREATE, None),
+    ("recipes-cart-remove", "delete",
+     "/api/recipes/{favorite}/shopping_cart/", 14, OWN_REMOVE, None),
+    ("recipes-cart-download", "get", "/api/recipes/download_shopping_cart/",
+     5, OWN, None),
+    ("recipes-cart-download-csv", "get",
+     "/api/recipes/download_shopping_cart/?format=csv", 5, OWN, None),
+    ("recipes-cart-download-pdf", "get",
+     "/api/recipes/download_shopping_cart/?format=pdf", 5, OWN, None),
+    ("users-list", "get", "/api/users/", 4, PUBLIC, None),
+    ("users-detail", "get", "/api/users/{followed}/", 4, PUBLIC, None),
+    ("users-me", "get", "/api/users/me/", 3, PRIVATE, None),
+    ("users-subscriptions", "get", "/api/users/subscriptions/", 6, PRIVATE,
+     None),
+    ("users-subscriptions-limit", "get",
+     "/api/users/subscriptions/?recipes_limit=3", 6, PRIVATE, None),
+    ("users-subscribe", "post", "/api/users/{unfollowed}/subscribe/", 12,
+     OWN_CREATE, None),
+    ("users-unsubscribe", "delete", "/api/users/{followed}/subscribe/", 8,
+     OWN_REMOVE, None),
+    ("users-create", "post", "/api/users/", 6, PUBLIC_CREATE,
+     new_user_payload),
+    ("auth-token-login", "post", "/api/auth/token/login/", 4, PUBLIC,
+     lambda ids: {"email": "cook1@foodgram.ru", "password": "Foodgram-2022"}),
+    ("auth-token-logout", "post", "/api/auth/token/logout/", 3, REMOVE,
+     None),
+    ("users-set-password", "post", "/api/users/set_password/", 4, REMOVE,
+     password_payload),
+    ("users-update", "put", "/api/users/{followed}/", 6, STAFF_ONLY,
+     user_payload),
+    ("users-partial-update", "patch", "/api/users/{followed}/", 6, STAFF_ONLY,
+     user_payload),
+    ("users-delete", "delete", "/api/users/{followed}/", 53, STAFF_REMOVE,
+     current_password_payload),
+    ("users-set-email", "post", "/api/users/set_email/", 4, REMOVE,
+     set_email_payload),
+    ("users-activation", "post", "/api/users/activation/", 2, REJECTED,
+     confirm_payload),
+    ("users-resend-activation", "post", "/api/users/resend_activation/", 2,
+     REJECTED, email_payload),
+    ("users-reset-password", "post", "/api/users/reset_password/", 2,
+     ACCEPTED, email_payload),
+    ("users-reset-password-confirm", "post",
+     "/api/users/reset_password_confirm/", 2, REJECTED, confirm_payload),
+    ("users-reset-email", "post", "/api/users/reset_email/", 2, ACCEPTED,
+     email_payload),
+    ("users-reset-email-confirm", "post", "/api/users/reset_email_confirm/",
+     3, REJECTED, confirm_payload),
+    ("api-root", "get", "/api/", 1, PUBLIC, None),
+    ("auth-root", "get", "/api/auth/", 1, PUBLIC, None),
+    # Те же маршруты djoser, подключенные под /api/auth/.
+    # Сериализатор djoser считает подписку отдельным запросом
+    # на пользователя.
+    ("auth-users-list", "get", "/api/auth/users/", 43, PUBLIC, None),
+    ("auth-users-create", "post", "/api/auth/users/", 6, PUBLIC_CREATE,
+     new_user_payload),
+    ("auth-users-detail", "get", "/api/auth/users/{followed}/", 3, PRIVATE,
+     None),
+    ("auth-users-update", "put", "/api/auth/users/{followed}/", 7,
+     STAFF_ONLY, user_payload),
+    ("auth-users-partial-update", "patch", "/api/auth/users/{followed}/", 7,
+     STAFF_ONLY, user_payload),
+    ("auth-users-delete", "delete", "/api/auth/users/{followed}/", 53,
+     STAFF_REMOVE, current_password_payload),
+    ("auth-users-me", "get", "/api/auth/users/me/", 2, PRIVATE, None),
+    ("auth-users-me-update", "put", "/api/auth/users/me/", 6, PRIVATE,
+     user_payload),
+    ("auth-users-me-partial-update", "patch", "/api/auth/users/me/", 6,
+     PRIVATE, user_payload),
+    # Каскадное удаление пользователя со всеми рецептами, избранным
+    # и корзиной проходит через построчные сигналы счетчиков.
+    ("auth-users-me-delete", "delete", "/api/auth/users/me/", 1463, REMOVE,
+     current_password_payload),
+    ("auth-users-set-password", "post", "/api/auth/users/set_password/", 3,
+     REMOVE, password_payload),
+    ("auth-users-set-email", "post", "/api/auth/users/set_email/", 4, REMOVE,
+     set_email_payload),
+    ("auth-users-activation", "post", "/api/auth/users/activation/", 2,
+     REJECTED, confirm_payload),
+    ("auth-users-resend-activation", "post",
+     "/api/auth/users/resend_activation/", 2, REJECTED, email_payload),
+    ("auth-users-reset-password", "post", "/api/auth/users/reset_password/",
+     2, ACCEPTED, email_payload),
+    ("auth-users-reset-password-confirm", "post",
+     "/api/auth/users/reset_password_confirm/", 2, REJECTED, confirm_payload),
+    ("auth-users-reset-email", "post", "/api/auth/users/reset_email/", 2,
+     ACCEPTED, email_payload),
+    ("auth-users-reset-email-confirm", "post",
+     "/api/auth/users/reset_email_confirm/", 3, REJECTED, confirm_payload),
+)
+
+
+def timed(client, method, url, data):
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = getattr(client, method)(url, data=data, format="json")
+        if response.streaming:
+            b"".join(response.streaming_content)
+        elapsed = time.perf_counter() - start
+    return response, len(queries.captured_queries), elapsed
+
+
+@pytest.mark.parametrize("role", ROLES)
+@pytest.mark.parametrize(
+    "name, method, url, budget, statuses, payload",
+    ROUTES,
+    ids=[route[0] for route in ROUTES],
+)
+def test_route_budget(
+    name,
+    method,
+    url,
+    budget,
+    statuses,
+    payload,
+    role,
+    ids,
+    make_client,
+    benchmark_report,
+):
+    client = make_client(role)
+    url = url.format(**ids)
+    data = payload(ids) if payload else None
+
+    response, queries, elapsed = timed(client, method, url, data)
+    timings = [elapsed]
+    warm_queries = queries
+    if method == "get":
+        for _ in range(settings.BENCHMARK_ROUNDS - 1):
+            _, warm_queries, elapsed = timed(client, method, url, data)
+            timings.append(elapsed)
+
+    benchmark_report[f"{name}[{role}]"] = {
+        "status": response.status_code,
+        "queries": queries,
+        "warm_queries": warm_queries,
+        "budget": budget,
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "max_ms": round(max(timings) * 1000, 3),
+    }
+
+    assert response.status_code == statuses[ROLES.index(role)], (
+        response.content
+    )
+    assert queries <= budget, (
+        f"{method.upper()} {url} от имени {role}: "
+        f"{queries} SQL-запросов при бюджете {budget}"
+    )
+
+
+HTTP_METHODS = ("get", "post", "put", "patch", "delete")
+
+
+def api_routes(patterns=None, prefix=""):
+    """
+    Пары (шаблон URL, метод) всех маршрутов API без суффиксов формата.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        # Как и resolve(), без «^» в начале регулярных выражений.
+        route = prefix + str(pattern.pattern).lstrip("^")
+        if not route.startswith("api/") or "(?P<format>" in route:
+            continue
+        if hasattr(pattern, "url_patterns"):
+            yield from api_routes(pattern.url_patterns, route)
+            continue
+        # HEAD дублирует GET и отдельно не измеряется.
+        view = pattern.callback
+        actions = getattr(view, "actions", None)
+        for method in HTTP_METHODS:
+            if method in actions if actions else hasattr(view.cls, method):
+                yield route, method
+
+
+def test_every_route_is_benchmarked(ids):
+    benchmarked = {
+        (resolve(urlsplit(url.format(**ids)).path).route, method)
+        for _, method, url, *_ in ROUTES
+    }
+    missing = sorted(set(api_routes()) - benchmarked)
+    assert not missing, f"Маршруты без строки в ROUTES: {missing}"
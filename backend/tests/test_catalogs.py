@@ -0,0 +1,74 @@
+import gzip
+
+import pytest
+
+from api.catalogs import accepts_gzip
+
+
+URLS = ("/api/tags/", "/api/ingredients/")
+
+
+def vary(response):
+    return [header.strip() for header in response["Vary"].split(",")]
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    (
+        ("", False),
+        ("gzip", True),
+        ("deflate, gzip;q=0.5", True),
+        ("GZIP ; Q=1", True),
+        ("gzip;q=0", False),
+        ("gzip;q=0.0, br", False),
+        ("*", True),
+        ("*;q=0", False),
+        ("gzip;q=0, *", False),
+        ("identity", False),
+        ("gzip;q=abc", False),
+    ),
+)
+def test_accepts_gzip(accept_encoding, expected):
+    assert accepts_gzip(accept_encoding) is expected
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_gzip_variant_matches_identity(url, make_client):
+    client = make_client("anonymous")
+    plain = client.get(url)
+    packed = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+    refused = client.get(url, HTTP_ACCEPT_ENCODING="gzip;q=0, deflate")
+
+    assert plain.status_code == packed.status_code == 200
+    assert "Content-Encoding" not in plain
+    assert "Content-Encoding" not in refused
+    assert refused.content == plain.content
+    assert packed["Content-Encoding"] == "gzip"
+    assert gzip.decompress(packed.content) == plain.content
+    assert packed["ETag"] != plain["ETag"]
+    for response in (plain, packed, refused):
+        assert "Accept-Encoding" in vary(response)
+
+
+@pytest.mark.parametrize("url", URLS)
+@pytest.mark.parametrize("accept_encoding", ("", "gzip"))
+def test_matching_etag_returns_not_modified(url, accept_encoding, make_client):
+    client = make_client("anonymous")
+    etag = client.get(url, HTTP_ACCEPT_ENCODING=accept_encoding)["ETag"]
+
+    response = client.get(
+        url,
+        HTTP_ACCEPT_ENCODING=accept_encoding,
+        HTTP_IF_NONE_MATCH=f'"stale", {etag}',
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response["ETag"] == etag
+    assert "Accept-Encoding" in vary(response)
+
+    stale = client.get(
+        url,
+        HTTP_ACCEPT_ENCODING=accept_encoding,
+        HTTP_IF_NONE_MATCH='"stale"',
+    )
+    assert stale.status_code == 200
@@ -0,0 +1,58 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from recipes.counters import reconcile_counters
+from recipes.models import Recipe
+from users.models import User
+
+from .test_benchmarks import recipe_batch_payload, recipe_payload
+
+
+def assert_no_drift():
+    assert not any(reconcile_counters(check=True).values())
+
+
+def test_counters_follow_api_writes(users, ids, make_client):
+    client = make_client("user")
+    client.post(f"/api/recipes/{ids['other']}/favorite/")
+    client.post(f"/api/recipes/{ids['other']}/shopping_cart/")
+    client.post(f"/api/users/{ids['unfollowed']}/subscribe/")
+    created = client.post(
+        "/api/recipes/", data=recipe_payload(ids), format="json"
+    ).json()["id"]
+    client.post(
+        "/api/recipes/batch/", data=recipe_batch_payload(ids), format="json"
+    )
+    assert_no_drift()
+
+    recipe = Recipe.objects.get(pk=ids["other"])
+    assert recipe.favorites_count == recipe.favorites.count() > 0
+    assert recipe.in_carts_count == recipe.shopping_list.count() > 0
+
+    client.delete(f"/api/recipes/{ids['other']}/favorite/")
+    client.delete(f"/api/recipes/{ids['other']}/shopping_cart/")
+    client.delete(f"/api/users/{ids['unfollowed']}/subscribe/")
+    client.delete(f"/api/recipes/{created}/")
+    User.objects.get(pk=ids["followed"]).delete()
+    assert_no_drift()
+
+
+def test_full_save_keeps_counters(users, ids, make_client):
+    stale = Recipe.objects.get(pk=ids["other"])
+    make_client("user").post(f"/api/recipes/{ids['other']}/favorite/")
+
+    stale.name = "Новое название"
+    stale.save()
+
+    assert_no_drift()
+    assert Recipe.objects.get(pk=stale.pk).name == "Новое название"
+
+
+def test_reconcile_counters_command(users):
+    User.objects.filter(pk=users["user"].pk).update(recipes_count=1000)
+    Recipe.objects.update(favorites_count=0)
+
+    with pytest.raises(CommandError):
+        call_command("reconcile_counters", "--check")
+    call_command("reconcile_counters")
+    call_command("reconcile_counters", "--check")
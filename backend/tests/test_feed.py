@@ -0,0 +1,107 @@
+from recipes.feed import follow_added, follow_removed
+from recipes.models import FeedEntry, Recipe
+from users.models import Follow, User
+
+from .test_benchmarks import recipe_payload
+
+
+def walk_feed(client):
+    ids, url = [], "/api/recipes/feed/?limit=7"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids.extend(recipe["id"] for recipe in response.json()["results"])
+        url = response.json()["next"]
+    return ids
+
+
+def expected_feed(user):
+    return list(
+        Recipe.objects.filter(author__following__user=user)
+        .order_by("-pub_date", "-id")
+        .values_list("id", flat=True)
+    )
+
+
+def test_feed_pages_match_followed_recipes(users, make_client):
+    assert walk_feed(make_client("user")) == expected_feed(users["user"])
+
+
+def test_publish_and_unfollow_update_feed(users, ids, make_client):
+    reader, author = make_client("user"), make_client("staff")
+    reader.post(f"/api/users/{users['staff'].pk}/subscribe/")
+    published = author.post(
+        "/api/recipes/", data=recipe_payload(ids), format="json"
+    ).json()["id"]
+
+    assert walk_feed(reader)[0] == published
+    assert walk_feed(reader) == expected_feed(users["user"])
+
+    reader.delete(f"/api/users/{users['staff'].pk}/subscribe/")
+    assert published not in walk_feed(reader)
+
+
+def test_popular_authors_are_pulled_on_read(users, ids, make_client, settings):
+    settings.FEED_FANOUT_MAX_FOLLOWERS = 0
+    reader, author = make_client("user"), make_client("staff")
+    reader.post(f"/api/users/{users['staff'].pk}/subscribe/")
+    published = author.post(
+        "/api/recipes/", data=recipe_payload(ids), format="json"
+    ).json()["id"]
+
+    assert not FeedEntry.objects.filter(recipe_id=published).exists()
+    assert walk_feed(reader) == expected_feed(users["user"])
+
+
+def test_crossing_fanout_threshold_rebuilds_feeds(
+    users, ids, make_client, settings
+):
+    author = users["staff"]
+    author.refresh_from_db()
+    settings.FEED_FANOUT_MAX_FOLLOWERS = author.followers_count + 1
+    reader, writer = make_client("user"), make_client("staff")
+    writer.post("/api/recipes/", data=recipe_payload(ids), format="json")
+    other = User.objects.exclude(pk__in=(author.pk, users["user"].pk)).first()
+
+    reader.post(f"/api/users/{author.pk}/subscribe/")
+    assert FeedEntry.objects.filter(author=author).exists()
+
+    # Подписчиков стало больше порога: рецепты автора уходят из лент.
+    Follow.objects.create(user=other, author=author)
+    assert not FeedEntry.objects.filter(author=author).exists()
+    published = writer.post(
+        "/api/recipes/", data=recipe_payload(ids), format="json"
+    ).json()["id"]
+    assert not FeedEntry.objects.filter(recipe_id=published).exists()
+    assert walk_feed(reader)[0] == published
+    assert walk_feed(reader) == expected_feed(users["user"])
+
+    # Снова не больше порога: последние рецепты раскладываются по лентам
+    # всех подписчиков, включая подписавшихся сверх порога.
+    reader.delete(f"/api/users/{author.pk}/subscribe/")
+    assert FeedEntry.objects.filter(user=other, recipe_id=published).exists()
+    assert list(
+        FeedEntry.objects.filter(user=other)
+        .order_by("-pub_date", "-recipe_id")
+        .values_list("recipe_id", flat=True)
+    ) == expected_feed(other)
+
+
+def test_threshold_crossed_by_several_followers(
+    users, ids, make_client, settings
+):
+    author, reader = users["staff"], users["user"]
+    make_client("user").post(f"/api/users/{author.pk}/subscribe/")
+    make_client("staff").post(
+        "/api/recipes/", data=recipe_payload(ids), format="json"
+    )
+    follow = Follow.objects.get(user=reader, author=author)
+    settings.FEED_FANOUT_MAX_FOLLOWERS = 2
+
+    # Параллельные подписки сдвинули счетчик сразу за порог.
+    follow_added(follow, 1, 4)
+    assert not FeedEntry.objects.filter(author=author).exists()
+
+    other = User.objects.exclude(pk__in=(author.pk, reader.pk)).first()
+    follow_removed(Follow(user=other, author=author), 4, 1)
+    assert FeedEntry.objects.filter(user=reader, author=author).exists()
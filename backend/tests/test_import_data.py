@@ -0,0 +1,36 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Ingredient
+
+
+def run_import(*args):
+    out = StringIO()
+    with CaptureQueriesContext(connection) as queries:
+        call_command("import_data", *args, stdout=out)
+    return out.getvalue(), len(queries.captured_queries)
+
+
+def test_import_skips_unchanged_file(db, tmp_path):
+    path = tmp_path / "ingredients.csv"
+    path.write_text(
+        "name,measurement_unit\nсоль,г\nкартофель,кг\nсоль,г\n",
+        encoding="utf-8",
+    )
+    before = Ingredient.objects.count()
+
+    output, _ = run_import(str(path))
+    assert "Добавлено: 1, пропущено: 2" in output
+    assert Ingredient.objects.count() == before + 1
+
+    output, queries = run_import(str(path))
+    assert "загрузка пропущена" in output
+    assert queries == 1
+
+
+def test_import_json_matches_csv(db, settings):
+    output, _ = run_import(str(settings.BASE_DIR / "data/ingredients.json"))
+    assert "Добавлено: 0" in output
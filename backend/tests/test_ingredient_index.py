@@ -0,0 +1,76 @@
+import pytest
+
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient
+
+
+NAMES = (
+    "Бзюйдовый соус",
+    "Зюйдовый соус",
+    "Соус зюйдовый",
+    "Ассорти зюйдовое",
+    "Козюйдник",
+    "Тесто на козюйде",
+)
+
+
+@pytest.fixture
+def ingredients(db, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit="г") for name in NAMES
+        )
+        ingredient_index.invalidate()
+
+
+def names(query):
+    return [ingredient.name for ingredient in ingredient_index.search(query)]
+
+
+def test_prefix_then_word_start_then_substring(ingredients):
+    assert names("ЗЮЙД") == [
+        "Зюйдовый соус",
+        "Ассорти зюйдовое",
+        "Соус зюйдовый",
+        "Бзюйдовый соус",
+        "Козюйдник",
+        "Тесто на козюйде",
+    ]
+
+
+def test_yo_is_folded_to_ye(db, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        Ingredient.objects.create(name="Свёкла зюйдовая", measurement_unit="г")
+        Ingredient.objects.create(name="Зелень ёжиковая", measurement_unit="г")
+
+    assert names("свекла зюйд") == names("СВЁКЛА ЗЮЙД") == ["Свёкла зюйдовая"]
+    assert names("ежик") == names("ёжик") == ["Зелень ёжиковая"]
+
+
+def test_index_is_invalidated_after_commit(
+    ingredients, django_capture_on_commit_callbacks
+):
+    assert names("зюйдик") == []
+    with django_capture_on_commit_callbacks() as callbacks:
+        Ingredient.objects.create(name="Зюйдик", measurement_unit="шт")
+        assert names("зюйдик") == []
+    assert names("зюйдик") == []
+
+    for callback in callbacks:
+        callback()
+    assert names("зюйдик") == ["Зюйдик"]
+
+
+def test_new_ingredient_is_found_through_api(
+    ingredients, make_client, django_capture_on_commit_callbacks
+):
+    client = make_client("anonymous")
+    assert client.get("/api/ingredients/?name=зюйдик").json() == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ingredient = Ingredient.objects.create(
+            name="Зюйдик", measurement_unit="шт"
+        )
+    assert client.get("/api/ingredients/?name=зюйдик").json() == [
+        {"id": ingredient.pk, "name": "Зюйдик", "measurement_unit": "шт"}
+    ]
@@ -0,0 +1,57 @@
+from recipes.models import Recipe
+
+
+def walk(client, url):
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+        data = response.json()
+        assert "count" not in data
+        pages.append([recipe["id"] for recipe in data["results"]])
+        url = data["next"]
+    return pages
+
+
+def test_cursor_walks_all_recipes(make_client):
+    pages = walk(
+        make_client("user"), "/api/recipes/?pagination=cursor&limit=50"
+    )
+
+    recipe_ids = [pk for page in pages for pk in page]
+    assert recipe_ids == list(
+        Recipe.objects.order_by("-pub_date", "-id").values_list(
+            "id", flat=True
+        )
+    )
+    assert all(len(page) == 50 for page in pages[:-1])
+
+
+def test_cursor_handles_equal_pub_dates(make_client):
+    newest = Recipe.objects.order_by("-pub_date", "-id")
+    tied = list(newest.values_list("id", flat=True)[:5])
+    Recipe.objects.filter(pk__in=tied).update(pub_date=newest[0].pub_date)
+
+    pages = walk(
+        make_client("user"), "/api/recipes/?pagination=cursor&limit=2"
+    )
+
+    recipe_ids = [pk for page in pages for pk in page]
+    assert len(recipe_ids) == len(set(recipe_ids)) == Recipe.objects.count()
+    assert recipe_ids[:5] == sorted(tied, reverse=True)
+
+
+def test_invalid_cursor_is_not_found(make_client):
+    client = make_client("user")
+    for cursor in ("garbage", "bm90LWEtZGF0ZXwx"):
+        response = client.get(f"/api/recipes/?cursor={cursor}")
+        assert response.status_code == 404
+
+
+def test_search_keeps_page_numbers_in_cursor_mode(make_client):
+    response = make_client("user").get(
+        "/api/recipes/?search=рецепт&pagination=cursor"
+    )
+
+    assert response.status_code == 200
+    assert "count" in response.json()
@@ -0,0 +1,186 @@
+from collections import defaultdict
+
+import pytest
+from django.core.cache import cache
+
+from recipes import background
+from recipes.models import Ingredient, Recipe, RecipeIngredients
+from recipes.pantry import (
+    VERSION_KEY,
+    bitmap,
+    compress,
+    nth_bits,
+    pantry_index,
+    to_bitmap,
+)
+
+from .test_benchmarks import recipe_payload
+
+
+@pytest.fixture(autouse=True)
+def skip_background_tasks(monkeypatch):
+    # Колбэки фиксации выполняются в тестах, а фоновые задачи — нет.
+    monkeypatch.setattr(background.executor, "submit", lambda *args: None)
+
+
+@pytest.fixture
+def fresh_index(settings, django_capture_on_commit_callbacks):
+    settings.PANTRY_INDEX_MAX_AGE = 0
+    with django_capture_on_commit_callbacks(execute=True):
+        pantry_index.invalidate()
+
+
+def expected(pantry, missing):
+    """
+    Подбор перебором всех рецептов.
+    """
+    ingredients = defaultdict(set)
+    for recipe_id, ingredient_id in RecipeIngredients.objects.values_list(
+        "recipe_id", "ingredient_id"
+    ):
+        ingredients[recipe_id].add(ingredient_id)
+    matches = []
+    recipe_ids = Recipe.objects.order_by("-pub_date", "-id").values_list(
+        "id", flat=True
+    )
+    for position, recipe_id in enumerate(recipe_ids):
+        have = len(ingredients[recipe_id] & pantry)
+        lacking = len(ingredients[recipe_id]) - have
+        if have and lacking <= missing:
+            matches.append(
+                ((lacking, -len(ingredients[recipe_id]), position), recipe_id)
+            )
+    return [recipe_id for _, recipe_id in sorted(matches)]
+
+
+def pantry_query(recipe_ids, extra=()):
+    pantry = set(
+        RecipeIngredients.objects.filter(recipe_id__in=recipe_ids).values_list(
+            "ingredient_id", flat=True
+        )
+    ) | set(extra)
+    return pantry, "&".join(f"ingredients={pk}" for pk in sorted(pantry))
+
+
+@pytest.mark.parametrize("missing", (0, 1, 2))
+def test_pantry_matches_brute_force(missing, ids, make_client, fresh_index):
+    pantry, query = pantry_query([ids["other"]], ids["ingredients"][:3])
+    client = make_client("user")
+
+    response = client.get(
+        f"/api/recipes/pantry/?{query}&missing={missing}&limit=1000"
+    )
+    assert response.status_code == 200
+    data = response.json()
+    matches = expected(pantry, missing)
+    assert ids["other"] in matches
+    assert data["count"] == len(matches)
+    assert [recipe["id"] for recipe in data["results"]] == matches
+
+
+def test_pantry_pages(ids, make_client, fresh_index):
+    pantry, query = pantry_query(
+        Recipe.objects.order_by("pk").values("pk")[:10]
+    )
+    matches = expected(pantry, 2)
+    assert len(matches) > 10
+
+    page = (
+        make_client("user")
+        .get(f"/api/recipes/pantry/?{query}&missing=2&limit=3&page=3")
+        .json()
+    )
+    assert page["count"] == len(matches)
+    assert [recipe["id"] for recipe in page["results"]] == matches[6:9]
+
+
+def test_pantry_sees_new_recipes(
+    ids, make_client, fresh_index, django_capture_on_commit_callbacks
+):
+    client = make_client("user")
+    version = cache.get(VERSION_KEY)
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe = Recipe.objects.create(
+            author_id=ids["followed"],
+            name="Новый",
+            text="Текст",
+            cooking_time=5,
+        )
+        RecipeIngredients.objects.create(
+            recipe=recipe, ingredient_id=ids["ingredients"][0], amount=1
+        )
+        # До фиксации транзакции версия индекса не меняется.
+        assert cache.get(VERSION_KEY) == version
+    assert cache.get(VERSION_KEY) != version
+
+    results = client.get(
+        f"/api/recipes/pantry/?ingredients={ids['ingredients'][0]}"
+    ).json()["results"]
+    assert results[0]["id"] == recipe.pk
+
+
+def test_pantry_sees_deleted_ingredients(
+    ids, make_client, fresh_index, django_capture_on_commit_callbacks
+):
+    client = make_client("user")
+    pantry, query = pantry_query([ids["other"]])
+    client.get(f"/api/recipes/pantry/?{query}")
+    version = cache.get(VERSION_KEY)
+
+    # Удаление ингредиента каскадом убирает его из рецептов.
+    with django_capture_on_commit_callbacks(execute=True):
+        Ingredient.objects.filter(pk=min(pantry)).delete()
+    assert cache.get(VERSION_KEY) != version
+
+    pantry, query = pantry_query([ids["other"]])
+    data = client.get(f"/api/recipes/pantry/?{query}&limit=1000").json()
+    assert [recipe["id"] for recipe in data["results"]] == expected(pantry, 0)
+
+
+def test_pantry_index_ignores_text_edits(
+    ids, make_client, django_capture_on_commit_callbacks
+):
+    client = make_client("user")
+    url = f"/api/recipes/{ids['recipe']}/"
+    payload = recipe_payload(ids)
+    with django_capture_on_commit_callbacks(execute=True):
+        client.patch(url, data=payload, format="json")
+
+    version = cache.get(VERSION_KEY)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.patch(
+            url, data=dict(payload, name="Другое имя"), format="json"
+        )
+    assert response.status_code == 200, response.content
+    assert cache.get(VERSION_KEY) == version
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.patch(
+            url,
+            data=dict(payload, ingredients=payload["ingredients"][:1]),
+            format="json",
+        )
+    assert response.status_code == 200, response.content
+    assert cache.get(VERSION_KEY) != version
+
+
+@pytest.mark.parametrize(
+    "query", ("", "ingredients=abc", "ingredients=1&missing=4")
+)
+def test_pantry_validates_parameters(query, make_client):
+    response = make_client("user").get(f"/api/recipes/pantry/?{query}")
+    assert response.status_code == 400
+
+
+def test_containers_and_bit_search():
+    sparse = compress([5, 1, 3], 1000)
+    dense = compress(list(range(0, 1000, 3)), 1000)
+    assert isinstance(sparse, bytes)
+    assert bitmap(sparse) == 0b101010
+    assert isinstance(dense, int)
+    assert bitmap(dense) == to_bitmap(range(0, 1000, 3), 1000)
+    assert nth_bits(dense, 100, 103) == [300, 303, 306]
+    assert nth_bits(to_bitmap([2, 40000, 70000], 80000), 1, 5) == [
+        40000,
+        70000,
+    ]
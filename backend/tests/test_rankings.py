@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, RecipeRanking, ShoppingCart
+from recipes.rankings import rank_recipes
+from users.models import User
+
+
+def positions(kind):
+    return list(
+        RecipeRanking.objects.filter(kind=kind)
+        .order_by("position")
+        .values_list("recipe_id", flat=True)
+    )
+
+
+def test_recent_additions_outweigh_old_ones(db):
+    fresh, stale = Recipe.objects.order_by("pk")[:2]
+    users = User.objects.order_by("pk")[:5]
+    now = timezone.now()
+    Favorite.objects.filter(recipe__in=(fresh, stale)).delete()
+    ShoppingCart.objects.filter(recipe__in=(fresh, stale)).delete()
+    Favorite.objects.bulk_create(
+        Favorite(user=user, recipe=stale) for user in users
+    )
+    Favorite.objects.filter(recipe=stale).update(
+        added_at=now - timedelta(days=5)
+    )
+    Favorite.objects.create(user=users[0], recipe=fresh)
+
+    rank_recipes(RecipeRanking.TRENDING, now=now)
+    rank_recipes(RecipeRanking.POPULAR, now=now)
+
+    trending = positions(RecipeRanking.TRENDING)
+    popular = positions(RecipeRanking.POPULAR)
+    assert trending.index(fresh.pk) < trending.index(stale.pk)
+    assert popular.index(stale.pk) < popular.index(fresh.pk)
+    assert len(trending) == len(popular) == Recipe.objects.count()
+
+
+def test_ranked_listings_follow_snapshot(ids, make_client):
+    call_command("rank_recipes")
+    client = make_client("user")
+
+    popular = client.get("/api/recipes/?ordering=popular&limit=20").json()
+    assert popular["count"] == Recipe.objects.count()
+    assert [recipe["id"] for recipe in popular["results"]] == positions(
+        RecipeRanking.POPULAR
+    )[:20]
+
+    trending = client.get(
+        f"/api/recipes/trending/?tags={ids['tag_slug']}&limit=20"
+    ).json()["results"]
+    expected = [
+        pk
+        for pk in positions(RecipeRanking.TRENDING)
+        if Recipe.objects.filter(pk=pk, tags__slug=ids["tag_slug"]).exists()
+    ][:20]
+    assert [recipe["id"] for recipe in trending] == expected
+
+
+def test_recipes_created_after_snapshot_are_listed_last(ids, make_client):
+    rank_recipes(RecipeRanking.POPULAR)
+    users = User.objects.order_by("pk")
+    newer = [
+        Recipe.objects.create(
+            author=user, name=f"Новый {i}", text="Текст", cooking_time=5
+        )
+        for i, user in enumerate(users[:2])
+    ]
+
+    response = (
+        make_client("user")
+        .get(f"/api/recipes/?ordering=popular&limit={Recipe.objects.count()}")
+        .json()
+    )
+    assert response["count"] == Recipe.objects.count()
+    assert [recipe["id"] for recipe in response["results"]] == positions(
+        RecipeRanking.POPULAR
+    ) + [newer[1].pk, newer[0].pk]
+
+
+def test_unknown_ordering_is_rejected(make_client):
+    response = make_client("user").get("/api/recipes/?ordering=random")
+    assert response.status_code == 400
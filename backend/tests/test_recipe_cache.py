@@ -0,0 +1,151 @@
+import pytest
+from django.core.cache import cache
+
+from recipes.cache import (
+    bump_recipe_versions,
+    get_recipe_ids,
+    recipe_ids_key,
+    recipe_representation_key,
+)
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Follow
+
+from .test_benchmarks import recipe_payload
+
+
+ORIGIN = "http://testserver"
+
+
+def cached_representation(recipe_id):
+    return cache.get(
+        recipe_representation_key(
+            Recipe.objects.get(pk=recipe_id), ORIGIN, "full"
+        )
+    )
+
+
+def test_viewer_flags_are_overlaid_on_cached_representation(
+    users, ids, make_client
+):
+    recipe = Recipe.objects.get(pk=ids["favorite"])
+    Follow.objects.get_or_create(user=users["user"], author=recipe.author)
+    for model in (Favorite, ShoppingCart):
+        model.objects.filter(user=users["staff"], recipe=recipe).delete()
+    Follow.objects.filter(user=users["staff"], author=recipe.author).delete()
+    url = f"/api/recipes/{recipe.pk}/"
+
+    own = make_client("user").get(url).json()
+    assert cached_representation(recipe.pk) is not None
+    staff = make_client("staff").get(url).json()
+    anonymous = make_client("anonymous").get(url).json()
+    again = make_client("user").get(url).json()
+
+    assert own == again
+    assert own["is_favorited"] and own["is_in_shopping_cart"]
+    assert own["author"]["is_subscribed"]
+    for data in (staff, anonymous):
+        assert not data["is_favorited"]
+        assert not data["is_in_shopping_cart"]
+        assert not data["author"]["is_subscribed"]
+        assert (
+            dict(
+                data,
+                is_favorited=True,
+                is_in_shopping_cart=True,
+                author=dict(data["author"], is_subscribed=True),
+            )
+            == own
+        )
+
+
+def test_recipe_update_invalidates_cache(ids, make_client):
+    client = make_client("user")
+    url = f"/api/recipes/{ids['recipe']}/"
+    client.get(url)
+
+    client.patch(
+        url,
+        data=dict(recipe_payload(ids), name="Переименованный рецепт"),
+        format="json",
+    )
+    assert client.get(url).json()["name"] == "Переименованный рецепт"
+
+
+def test_author_edit_invalidates_cache(users, ids, make_client):
+    client = make_client("staff")
+    url = f"/api/recipes/{ids['recipe']}/"
+    client.get(url)
+
+    author = users["user"]
+    author.first_name = "Переименованный"
+    author.save()
+    assert client.get(url).json()["author"]["first_name"] == (
+        "Переименованный"
+    )
+
+
+def test_tag_edit_invalidates_cache(ids, make_client):
+    recipe = Recipe.objects.filter(tags__isnull=False).first()
+    client = make_client("user")
+    url = f"/api/recipes/{recipe.pk}/"
+    client.get(url)
+
+    tag = recipe.tags.first()
+    tag.name = "Переименованный тег"
+    tag.save()
+    names = [item["name"] for item in client.get(url).json()["tags"]]
+    assert "Переименованный тег" in names
+
+
+def test_full_save_keeps_bumped_version(ids):
+    recipe = Recipe.objects.get(pk=ids["recipe"])
+    bump_recipe_versions(Recipe.objects.filter(pk=recipe.pk))
+
+    recipe.name = "Сохраненный целиком"
+    recipe.save()
+    assert Recipe.objects.get(pk=recipe.pk).version == recipe.version + 1
+
+
+@pytest.mark.parametrize(
+    "model, action", ((Favorite, "favorite"), (ShoppingCart, "shopping_cart"))
+)
+def test_recipe_ids_follow_add_and_remove(
+    model, action, users, ids, make_client, django_capture_on_commit_callbacks
+):
+    user, client = users["user"], make_client("user")
+    url = f"/api/recipes/{ids['other']}/{action}/"
+    assert ids["other"] not in get_recipe_ids(user, model)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert client.post(url).status_code == 201
+    assert ids["other"] in get_recipe_ids(user, model)
+    with django_capture_on_commit_callbacks(execute=True):
+        assert client.delete(url).status_code == 204
+    assert ids["other"] not in get_recipe_ids(user, model)
+
+
+def test_recipe_ids_are_loaded_on_cold_cache(users, ids):
+    user = users["user"]
+    key = recipe_ids_key(user.pk, Favorite)
+    assert cache.get(key) is None
+
+    assert ids["favorite"] in get_recipe_ids(user, Favorite)
+    assert cache.get(key) is not None
+    assert get_recipe_ids(user, Favorite) == frozenset(
+        Favorite.objects.filter(user=user).values_list("recipe_id", flat=True)
+    )
+
+
+@pytest.mark.parametrize("model", (Favorite, ShoppingCart))
+def test_recipe_ids_follow_orm_changes(
+    model, users, ids, django_capture_on_commit_callbacks
+):
+    user = users["user"]
+    assert ids["other"] not in get_recipe_ids(user, model)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        model.objects.create(user=user, recipe_id=ids["other"])
+    assert ids["other"] in get_recipe_ids(user, model)
+    with django_capture_on_commit_callbacks(execute=True):
+        Recipe.objects.filter(pk=ids["other"]).delete()
+    assert ids["other"] not in get_recipe_ids(user, model)
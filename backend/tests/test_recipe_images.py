@@ -0,0 +1,57 @@
+import hashlib
+
+from PIL import Image
+
+from recipes.images import generate_variants
+from recipes.models import Recipe
+
+from .test_benchmarks import recipe_payload
+
+
+def test_variants_replace_original_in_responses(ids, make_client, settings):
+    client = make_client("user")
+    payload = recipe_payload(ids)
+    response = client.post("/api/recipes/", data=payload, format="json")
+    assert response.status_code == 201, response.content
+    recipe = Recipe.objects.get(pk=response.json()["id"])
+    original = recipe.image.name
+
+    generate_variants(recipe.pk)
+
+    recipe.refresh_from_db()
+    assert recipe.image_variants["source"] == original
+    for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        with recipe.image.storage.open(recipe.image_variants[variant]) as f:
+            image = Image.open(f)
+            assert image.format == "WEBP"
+            assert image.width <= size[0] and image.height <= size[1]
+
+    detail = client.get(f"/api/recipes/{recipe.pk}/").json()
+    assert detail["image"].endswith(recipe.image_variants["full"])
+    listed = client.get("/api/recipes/?limit=1").json()["results"][0]
+    assert listed["image"].endswith(recipe.image_variants["card"])
+    short = client.post(f"/api/recipes/{recipe.pk}/favorite/").json()
+    assert short["image"].endswith(recipe.image_variants["thumbnail"])
+
+
+def test_identical_images_are_stored_once(ids, make_client):
+    client = make_client("user")
+    payload = recipe_payload(ids)
+    first, second = (
+        client.post(
+            "/api/recipes/", data=dict(payload, name=name), format="json"
+        ).json()["id"]
+        for name in ("Первый рецепт", "Второй рецепт")
+    )
+    first, second = Recipe.objects.filter(pk__in=(first, second))
+    assert first.image.name == second.image.name
+    with first.image.open("rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    assert first.image.name == f"recipes/{digest[:2]}/{digest}.png"
+
+    generate_variants(first.pk)
+    generate_variants(second.pk)
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.image_variants == second.image_variants
+    assert first.image_variants["card"].startswith("recipes/variants/")
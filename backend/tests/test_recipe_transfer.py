@@ -0,0 +1,27 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count
+
+from recipes.models import Recipe, RecipeIngredients
+from recipes.shopping_cart import live_shopping_list, stored_shopping_list
+from users.models import User
+
+
+def test_export_import_round_trip(db, tmp_path):
+    path = tmp_path / "recipes.jsonl"
+    call_command("export_recipes", output=str(path), stderr=StringIO())
+    recipes = Recipe.objects.count()
+    links = RecipeIngredients.objects.count()
+
+    Recipe.objects.all().delete()
+    User.objects.filter(username__startswith="cook2").delete()
+    call_command("import_recipes", str(path), stdout=StringIO())
+
+    assert Recipe.objects.count() == recipes
+    assert RecipeIngredients.objects.count() == links
+    assert not Recipe.objects.annotate(
+        tags_count=Count("tags")
+    ).filter(tags_count=0).exists()
+    for user in User.objects.filter(shopping_list__isnull=False).distinct():
+        assert stored_shopping_list(user.id) == live_shopping_list(user.id)
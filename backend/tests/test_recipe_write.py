@@ -0,0 +1,137 @@
+import json
+from base64 import b64decode
+from io import BytesIO
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Ingredient, RecipeIngredients
+
+from .test_benchmarks import recipe_payload
+
+
+def patch(client, ids, ingredients):
+    payload = recipe_payload(ids)
+    payload["ingredients"] = ingredients
+    with CaptureQueriesContext(connection) as queries:
+        response = client.patch(
+            f"/api/recipes/{ids['recipe']}/", data=payload, format="json"
+        )
+    return response, len(queries.captured_queries)
+
+
+def test_update_cost_does_not_depend_on_ingredients(ids, make_client):
+    client = make_client("user")
+    pks = list(Ingredient.objects.values_list("pk", flat=True)[:40])
+
+    response, small = patch(
+        client, ids, [{"id": pk, "amount": 1} for pk in pks[:2]]
+    )
+    assert response.status_code == 200, response.content
+    response, large = patch(
+        client, ids, [{"id": pk, "amount": 1} for pk in pks]
+    )
+    assert response.status_code == 200, response.content
+    assert large <= small + 1
+
+
+def test_update_touches_only_changed_rows(ids, make_client):
+    client = make_client("user")
+    pks = list(Ingredient.objects.values_list("pk", flat=True)[:5])
+    patch(client, ids, [{"id": pk, "amount": 10} for pk in pks])
+    kept = dict(
+        RecipeIngredients.objects.filter(recipe_id=ids["recipe"]).values_list(
+            "ingredient_id", "pk"
+        )
+    )
+
+    response, _ = patch(
+        client,
+        ids,
+        [{"id": pks[0], "amount": 20}]
+        + [{"id": pk, "amount": 10} for pk in pks[1:4]]
+        + [{"id": ids["ingredients"][-1], "amount": 5}],
+    )
+
+    assert response.status_code == 200, response.content
+    rows = {
+        row.ingredient_id: row
+        for row in RecipeIngredients.objects.filter(recipe_id=ids["recipe"])
+    }
+    assert {pk: rows[pk].pk for pk in pks[:4]} == {
+        pk: kept[pk] for pk in pks[:4]
+    }
+    assert rows[pks[0]].amount == 20
+    assert pks[4] not in rows
+    assert rows[ids["ingredients"][-1]].amount == 5
+
+
+def test_unknown_ingredient_is_rejected(ids, make_client):
+    response, _ = patch(
+        make_client("user"), ids, [{"id": 10 ** 9, "amount": 1}]
+    )
+
+    assert response.status_code == 400
+
+
+def test_empty_tags_are_rejected(ids, make_client):
+    payload = dict(recipe_payload(ids), tags=[])
+
+    response = make_client("user").post(
+        "/api/recipes/", data=payload, format="json"
+    )
+
+    assert response.status_code == 400
+    assert "tags" in response.json()
+
+
+def test_invalid_tag_reports_element_type(ids, make_client):
+    payload = dict(recipe_payload(ids), tags=[ids["tags"][0], {"id": 1}])
+
+    response = make_client("user").post(
+        "/api/recipes/", data=payload, format="json"
+    )
+
+    assert response.status_code == 400
+    assert "dict" in response.json()["tags"][0]
+
+
+def test_batch_reports_errors_per_item(ids, make_client):
+    payload = recipe_payload(ids)
+    broken = dict(payload, ingredients=[{"id": 10 ** 9, "amount": 1}])
+
+    response = make_client("user").post(
+        "/api/recipes/batch/", data=[payload, broken], format="json"
+    )
+
+    assert response.status_code == 207, response.content
+    created, failed = response.json()
+    assert created["name"] == payload["name"]
+    assert len(created["ingredients"]) == len(payload["ingredients"])
+    assert RecipeIngredients.objects.filter(recipe_id=created["id"]).count()
+    assert "errors" in failed
+
+
+def test_create_from_multipart(ids, make_client):
+    payload = recipe_payload(ids)
+    image = BytesIO(b64decode(payload["image"].split(",")[1]))
+    image.name = "photo.png"
+
+    response = make_client("user").post(
+        "/api/recipes/",
+        data={
+            "name": payload["name"],
+            "text": payload["text"],
+            "cooking_time": payload["cooking_time"],
+            "tags": payload["tags"],
+            "ingredients": json.dumps(payload["ingredients"]),
+            "image": image,
+        },
+        format="multipart",
+    )
+
+    assert response.status_code == 201, response.content
+    data = response.json()
+    assert len(data["ingredients"]) == len(payload["ingredients"])
+    assert data["tags"] == payload["tags"]
+    assert data["image"].endswith(".png")
@@ -0,0 +1,21 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from recipes.shopping_cart import live_shopping_list, stored_shopping_list
+from users.models import User
+
+
+def seed(prefix):
+    out = StringIO()
+    call_command(
+        "seed_load_data", users=30, recipes=120, prefix=prefix, stdout=out
+    )
+    return out.getvalue().split(". Время")[0]
+
+
+def test_seed_is_deterministic(db):
+    assert seed("alpha") == seed("beta")
+
+    for user in User.objects.filter(username__startswith="alpha"):
+        assert stored_shopping_list(user.id) == live_shopping_list(user.id)
@@ -0,0 +1,57 @@
+from django.core.management import call_command
+
+from recipes.models import Recipe, ShoppingCartIngredient
+from recipes.shopping_cart import live_shopping_list, stored_shopping_list
+
+
+def assert_consistent(*users):
+    for user in users:
+        assert stored_shopping_list(user.id) == live_shopping_list(user.id)
+
+
+def test_cart_add_and_remove_keep_totals(users, ids, make_client):
+    client = make_client("user")
+    user = users["user"]
+
+    client.post(f"/api/recipes/{ids['other']}/shopping_cart/")
+    assert_consistent(user)
+
+    client.delete(f"/api/recipes/{ids['other']}/shopping_cart/")
+    client.delete(f"/api/recipes/{ids['favorite']}/shopping_cart/")
+    assert_consistent(user)
+
+
+def test_recipe_update_and_delete_keep_totals(users, ids, make_client):
+    client = make_client("user")
+    user, staff = users["user"], users["staff"]
+    recipe = Recipe.objects.get(pk=ids["recipe"])
+    for role in ("user", "staff"):
+        make_client(role).post(f"/api/recipes/{recipe.pk}/shopping_cart/")
+
+    response = client.patch(
+        f"/api/recipes/{recipe.pk}/",
+        data={
+            "ingredients": [
+                {"id": pk, "amount": 7} for pk in ids["ingredients"][:4]
+            ],
+            "tags": ids["tags"][:1],
+            "name": recipe.name,
+            "text": recipe.text,
+            "cooking_time": recipe.cooking_time,
+        },
+        format="json",
+    )
+    assert response.status_code == 200, response.content
+    assert_consistent(user, staff)
+
+    client.delete(f"/api/recipes/{recipe.pk}/")
+    assert_consistent(user, staff)
+
+
+def test_check_shopping_lists_rebuilds_drift(users, ids):
+    user = users["user"]
+    ShoppingCartIngredient.objects.filter(user=user).update(amount=1)
+
+    call_command("check_shopping_lists")
+
+    assert_consistent(user)
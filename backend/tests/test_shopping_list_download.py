@@ -0,0 +1,115 @@
+import csv
+import io
+
+import pytest
+from django.conf import settings
+from reportlab.pdfbase import pdfmetrics
+
+from api.pdf import FONT_SIZE, register_font, render_pdf, wrap
+from recipes.models import ShoppingCartIngredient
+
+
+URL = "/api/recipes/download_shopping_cart/"
+
+
+def download(client, query="", **headers):
+    response = client.get(f"{URL}{query}", **headers)
+    assert response.status_code == 200
+    return response, b"".join(response.streaming_content)
+
+
+def shopping_list(user):
+    return [
+        [name, unit, str(amount)]
+        for name, unit, amount in ShoppingCartIngredient.objects.filter(
+            user=user, amount__gt=0
+        )
+        .order_by("ingredient__name", "ingredient__measurement_unit")
+        .values_list(
+            "ingredient__name", "ingredient__measurement_unit", "amount"
+        )
+    ]
+
+
+def test_csv_lists_stored_totals(users, ids, make_client):
+    response, body = download(make_client("user"), "?format=csv")
+
+    assert response["Content-Type"] == "text/csv; charset=utf-8"
+    assert body.startswith("﻿".encode())
+    rows = list(csv.reader(io.StringIO(body.decode()[1:])))
+    assert rows[0] == ["Ингредиент", "Единица измерения", "Количество"]
+    assert rows[1:] == shopping_list(users["user"])
+
+
+def test_pdf_is_a_pdf_document(ids, make_client):
+    response, body = download(make_client("user"), "?format=pdf")
+
+    assert response["Content-Type"] == "application/pdf"
+    assert body.startswith(b"%PDF-")
+    assert body.rstrip().endswith(b"%%EOF")
+
+
+def test_pdf_embeds_font_subset():
+    body = b"".join(
+        render_pdf(["Молоко (л) - 2"] * 3, settings.SHOPPING_LIST_FONT)
+    )
+
+    with open(settings.SHOPPING_LIST_FONT, "rb") as font:
+        assert len(body) < len(font.read()) / 10
+
+
+def test_pdf_wraps_long_lines_and_breaks_pages():
+    font = register_font(settings.SHOPPING_LIST_FONT)
+    width = 300
+    words = "Очень длинное название ингредиента " * 10
+    word = "Безпробеловнаястрока" * 20
+
+    wrapped = list(wrap([words, word, ""], font, width))
+    assert len(wrapped) > 3
+    assert wrapped[-1] == ""
+    assert all(
+        pdfmetrics.stringWidth(line, font, FONT_SIZE) <= width
+        for line in wrapped
+    )
+    assert "".join(wrap([word], font, width)) == word
+
+
+def test_pdf_is_produced_page_by_page():
+    # 200 строк по 16 пунктов на страницах A4 с полями — 5 страниц.
+    chunks = render_pdf(
+        (f"Строка {i}" for i in range(200)), settings.SHOPPING_LIST_FONT
+    )
+    assert next(chunks).startswith(b"%PDF-")
+    pages = [next(chunks) for _ in range(5)]
+    assert all(b"/Type /Page " in page for page in pages)
+    assert not any(b"/FontFile2" in page for page in pages)
+
+    trailer = b"".join(chunks)
+    assert b"/Count 5" in trailer
+    assert b"/FontFile2" in trailer
+    assert trailer.rstrip().endswith(b"%%EOF")
+
+
+@pytest.mark.parametrize(
+    "query, headers, content_type",
+    (
+        ("", {}, "text/plain; charset=utf-8"),
+        ("", {"HTTP_ACCEPT": "text/csv"}, "text/csv; charset=utf-8"),
+        ("", {"HTTP_ACCEPT": "application/pdf"}, "application/pdf"),
+        (
+            "?format=csv",
+            {"HTTP_ACCEPT": "application/pdf"},
+            "text/csv; charset=utf-8",
+        ),
+        # Неподдерживаемый Accept — формат по умолчанию, а не 406.
+        ("", {"HTTP_ACCEPT": "application/json"}, "text/plain; charset=utf-8"),
+        (
+            "?format=pdf",
+            {"HTTP_ACCEPT": "application/json"},
+            "application/pdf",
+        ),
+    ),
+)
+def test_format_negotiation(query, headers, content_type, ids, make_client):
+    response, _ = download(make_client("user"), query, **headers)
+    assert response["Content-Type"] == content_type
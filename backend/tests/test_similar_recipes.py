@@ -0,0 +1,207 @@
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes import background, similarity
+from recipes.models import Recipe, RecipeIngredients, SimilarRecipe
+from recipes.similarity import (
+    INGREDIENT,
+    TAG,
+    feature_weights,
+    rebuild_similar_recipes,
+    refresh_similar_recipes,
+)
+
+
+def neighbours():
+    table = defaultdict(list)
+    for recipe_id, similar_id, score in SimilarRecipe.objects.order_by(
+        "recipe_id", "-score", "similar_id"
+    ).values_list("recipe_id", "similar_id", "score"):
+        table[recipe_id].append((similar_id, round(score, 9)))
+    return dict(table)
+
+
+def brute_force():
+    """
+    Косинусное сходство всех пар рецептов без обратного индекса.
+    """
+    weights = feature_weights()
+    vectors = defaultdict(dict)
+    for recipe_id, ingredient_id in RecipeIngredients.objects.values_list(
+        "recipe_id", "ingredient_id"
+    ):
+        vectors[recipe_id][INGREDIENT, ingredient_id] = 0
+    for recipe_id, tag_id in Recipe.tags.through.objects.values_list(
+        "recipe_id", "tag_id"
+    ):
+        vectors[recipe_id][TAG, tag_id] = 0
+    for vector in vectors.values():
+        for feature in list(vector):
+            if feature in weights:
+                vector[feature] = weights[feature]
+            else:
+                del vector[feature]
+
+    def cosine(first, second):
+        dot = sum(
+            weight * second[feature]
+            for feature, weight in first.items()
+            if feature in second
+        )
+        norms = math.sqrt(sum(w * w for w in first.values())) * math.sqrt(
+            sum(w * w for w in second.values())
+        )
+        return dot / norms if norms else 0
+
+    table = {}
+    for recipe_id, vector in vectors.items():
+        scores = [
+            (other_id, round(cosine(vector, other), 9))
+            for other_id, other in vectors.items()
+            if other_id != recipe_id
+        ]
+        scores = sorted(
+            (item for item in scores if item[1] > 0),
+            key=lambda item: (-item[1], item[0]),
+        )[: settings.SIMILAR_RECIPES_COUNT]
+        if scores:
+            table[recipe_id] = scores
+    return table
+
+
+def test_rebuild_matches_brute_force(db):
+    rebuild_similar_recipes()
+    assert neighbours() == brute_force()
+
+
+def copy_features(recipe, other):
+    RecipeIngredients.objects.filter(recipe=recipe).delete()
+    RecipeIngredients.objects.bulk_create(
+        RecipeIngredients(
+            recipe=recipe, ingredient_id=ingredient_id, amount=amount
+        )
+        for ingredient_id, amount in RecipeIngredients.objects.filter(
+            recipe=other
+        ).values_list("ingredient_id", "amount")
+    )
+    recipe.tags.set(other.tags.all())
+
+
+def test_refresh_after_edit_matches_rebuild(db, ids):
+    recipe = Recipe.objects.get(pk=ids["recipe"])
+    other = Recipe.objects.exclude(pk=recipe.pk).order_by("pk").first()
+    copy_features(recipe, other)
+
+    refresh_similar_recipes([recipe.pk])
+    refreshed = neighbours()
+    assert refreshed[recipe.pk][0] == (other.pk, 1.0)
+
+    rebuild_similar_recipes()
+    assert refreshed[recipe.pk] == neighbours()[recipe.pk]
+    for recipe_id, items in refreshed.items():
+        assert (recipe.pk in dict(items)) == (
+            recipe.pk in dict(neighbours()[recipe_id])
+        )
+
+
+def test_overlapping_refreshes_keep_both_updates(db, ids, monkeypatch):
+    other = Recipe.objects.order_by("pk").first()
+    first, second = Recipe.objects.exclude(pk=other.pk).order_by("-pk")[:2]
+    copy_features(first, other)
+    copy_features(second, other)
+
+    build_index = similarity.build_index
+
+    def finish_other_refresh_first(vectors):
+        # Второй пересчет успевает записать списки, пока первый
+        # считает сходство.
+        monkeypatch.setattr(similarity, "build_index", build_index)
+        refresh_similar_recipes([second.pk])
+        return build_index(vectors)
+
+    monkeypatch.setattr(similarity, "build_index", finish_other_refresh_first)
+    refresh_similar_recipes([first.pk])
+
+    table = neighbours()
+    assert {first.pk, second.pk} <= set(dict(table[other.pk]))
+    assert second.pk in dict(table[first.pk])
+    assert all(
+        len(items) <= settings.SIMILAR_RECIPES_COUNT
+        for items in table.values()
+    )
+
+
+def test_refreshes_write_one_at_a_time(db, ids, monkeypatch):
+    locked = []
+    write_neighbours = similarity.write_neighbours
+
+    def write_under_lock(neighbours):
+        assert not similarity.refresh_lock.acquire(blocking=False)
+        write_neighbours(neighbours)
+
+    monkeypatch.setattr(similarity, "lock_recipes", locked.extend)
+    monkeypatch.setattr(similarity, "write_neighbours", write_under_lock)
+    refresh_similar_recipes([ids["recipe"]])
+
+    assert ids["recipe"] in locked
+    assert set(
+        SimilarRecipe.objects.filter(similar_id=ids["recipe"]).values_list(
+            "recipe_id", flat=True
+        )
+    ) <= set(locked)
+
+
+def test_delete_refreshes_lists_it_was_in(
+    db, monkeypatch, django_capture_on_commit_callbacks
+):
+    monkeypatch.setattr(
+        background.executor, "submit", lambda run, task, *args: task(*args)
+    )
+    deleted = Recipe.objects.get(
+        pk=SimilarRecipe.objects.order_by("pk").first().similar_id
+    )
+    listed_in = list(
+        SimilarRecipe.objects.filter(similar=deleted).values_list(
+            "recipe_id", flat=True
+        )
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        deleted.delete()
+
+    refreshed = neighbours()
+    rebuild_similar_recipes()
+    rebuilt = neighbours()
+    assert listed_in
+    for recipe_id in listed_in:
+        assert refreshed[recipe_id] == rebuilt[recipe_id]
+
+
+def test_refresh_reuses_weights_of_last_rebuild(db, ids):
+    rebuild_similar_recipes()
+
+    with CaptureQueriesContext(connection) as queries:
+        refresh_similar_recipes([ids["recipe"]])
+
+    assert not any(
+        "COUNT(DISTINCT" in query["sql"] for query in queries.captured_queries
+    )
+
+
+def test_similar_endpoint_follows_table(ids, make_client):
+    client = make_client("user")
+    response = client.get(f"/api/recipes/{ids['recipe']}/similar/")
+    assert response.status_code == 200
+    assert [recipe["id"] for recipe in response.json()] == list(
+        SimilarRecipe.objects.filter(recipe_id=ids["recipe"])
+        .order_by("-score", "similar_id")
+        .values_list("similar_id", flat=True)
+    )
+
+    missing = Recipe.objects.order_by("-pk").first().pk + 1
+    response = client.get(f"/api/recipes/{missing}/similar/")
+    assert response.status_code == 404
@@ -0,0 +1,35 @@
+from recipes.models import Recipe
+from users.models import User
+
+
+USER_FIELDS = ("email", "id", "username", "first_name", "last_name")
+
+
+def test_subscriptions_limit_latest_recipes(users, make_client):
+    client = make_client("user")
+    response = client.get("/api/users/subscriptions/?recipes_limit=2&limit=50")
+    assert response.status_code == 200
+
+    results = response.json()["results"]
+    authors = User.objects.filter(following__user=users["user"])
+    assert [
+        {field: author[field] for field in USER_FIELDS} for author in results
+    ] == list(authors.values(*USER_FIELDS))
+
+    for author in results:
+        recipes = Recipe.objects.filter(author_id=author["id"]).order_by(
+            "-pub_date", "-id"
+        )
+        assert author["is_subscribed"] is True
+        assert author["recipes_count"] == recipes.count()
+        assert [recipe["id"] for recipe in author["recipes"]] == list(
+            recipes.values_list("id", flat=True)[:2]
+        )
+
+
+def test_subscriptions_without_limit(make_client):
+    client = make_client("user")
+    results = client.get("/api/users/subscriptions/").json()["results"]
+    assert results
+    for author in results:
+        assert len(author["recipes"]) == author["recipes_count"]
@@ -11,6 +11,8 @@ class UsersAdmin(admin.ModelAdmin):
         "email",
         "first_name",
         "last_name",
+        "recipes_count",
+        "followers_count",
     )
     search_fields = ("email", "username")
     list_filter = ("email", "username")
@@ -5,7 +5,35 @@ from django.db.models import UniqueConstraint
 from .validators import validate_username
 
 
-class User(AbstractUser):
+class CountersModel(models.Model):
+    """
+    Модель с денормализованными счетчиками. Счетчики (и версия
+    рецепта) меняются только атомарными UPDATE с F(), поэтому при
+    сохранении объекта целиком они не записываются и не затирают
+    чужие приращения.
+    """
+
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and not kwargs.get("force_insert")
+            and kwargs.get("update_fields") is None
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class User(CountersModel, AbstractUser):
     username = models.CharField(
         max_length=150,
         unique=True,
@@ -15,6 +43,14 @@ class User(AbstractUser):
     first_name = models.CharField("Имя", max_length=150, blank=True)
     last_name = models.CharField("Фамилия", max_length=150, blank=True)
     email = models.EmailField(max_length=254, unique=True, null=False)
+    recipes_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Число рецептов"
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Число подписчиков"
+    )
+
+    counter_fields = ("recipes_count", "followers_count")
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]
@@ -5,7 +5,6 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.fields import SerializerMethodField
 from rest_framework.serializers import ModelSerializer
 
-from recipes.models import Recipe
 from recipes.serializers import FavoriteRecipeSerializer
 
 from .models import Follow, User
@@ -42,6 +41,8 @@ class CustomUserSerializer(UserSerializer):
         user = self.context.get("request").user
         if user.is_anonymous:
             return False
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         return Follow.objects.filter(user=user, author=obj.id).exists()
 
     class Meta:
@@ -79,8 +80,10 @@ class FollowSerializer(ModelSerializer):
         return data
 
     def to_representation(self, instance):
+        author = instance.author
+        author.is_subscribed = True
         return FollowListSerializer(
-            instance.author, context={"request": self.context.get("request")}
+            author, context={"request": self.context.get("request")}
         ).data
 
     class Meta:
@@ -88,43 +91,36 @@ class FollowSerializer(ModelSerializer):
         fields = ("user", "author")
 
 
+def get_recipes_limit(request):
+    """
+    Число рецептов каждого автора в списке подписок из параметра
+    recipes_limit, None — без ограничения.
+    """
+    try:
+        return max(int(request.query_params["recipes_limit"]), 0)
+    except (KeyError, ValueError):
+        return None
+
+
 class FollowListSerializer(CustomUserSerializer):
     """
     Сериализатор для работы со списком подписок.
+
+    Флаг подписки берется из аннотации, а рецепты — из
+    prefetch_related, если они есть у автора.
     """
 
-    email = serializers.ReadOnlyField(source="author.email")
-    id = serializers.ReadOnlyField(source="author.id")
-    username = serializers.ReadOnlyField(source="author.username")
-    first_name = serializers.ReadOnlyField(source="author.first_name")
-    last_name = serializers.ReadOnlyField(source="author.last_name")
     recipes = SerializerMethodField()
-    recipes_count = SerializerMethodField()
-    is_subscribed = SerializerMethodField(read_only=True)
 
     def get_recipes(self, author):
-        queryset = self.context.get("request")
-        recipes_limit = queryset.query_params.get("recipes_limit")
-        if not recipes_limit:
-            return FavoriteRecipeSerializer(
-                Recipe.objects.filter(author=author),
-                many=True,
-                context={"request": queryset},
-            ).data
+        recipes = author.recipes.all()
+        limit = get_recipes_limit(self.context["request"])
+        if limit is not None:
+            recipes = recipes[:limit]
         return FavoriteRecipeSerializer(
-            Recipe.objects.filter(author=author)[: int(recipes_limit)],
-            many=True,
-            context={"request": queryset},
+            recipes, many=True, context=self.context
         ).data
 
-    def get_recipes_count(self, author):
-        return Recipe.objects.filter(author=author).count()
-
-    def get_is_subscribed(self, author):
-        return Follow.objects.filter(
-            user=self.context.get("request").user, author=author
-        ).exists()
-
     class Meta:
         model = User
         fields = (
@@ -8,13 +8,6 @@ router_v1 = DefaultRouter()
 router_v1.register("users", CustomUserViewSet, basename="users")
 
 urlpatterns = [
-    path(
-        "users/<int:id>/subscribe/",
-        CustomUserViewSet.as_view(
-            {"post": "subscribe", "delete": "subscribe"}
-        ),
-        name="subscribe",
-    ),
     path("", include(router_v1.urls)),
     path("auth/", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
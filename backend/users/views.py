@@ -1,3 +1,11 @@
+from django.db.models import (
+    BooleanField,
+    Exists,
+    OuterRef,
+    Prefetch,
+    Value,
+    prefetch_related_objects,
+)
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status
@@ -9,12 +17,38 @@ from rest_framework.permissions import (
 from rest_framework.response import Response
 
 from api.paginations import SixPagePagination
-from users.serializers import FollowListSerializer, FollowSerializer
+from api.permissions import IsCurrentUserOrAdminOrReadOnly
+from recipes.models import Recipe
+from recipes.queries import latest_recipes_per_author
+from users.serializers import (
+    FollowListSerializer,
+    FollowSerializer,
+    get_recipes_limit,
+)
 
 from .models import Follow, User
 from .serializers import CustomUserSerializer
 
 
+def prefetch_latest_recipes(authors, limit):
+    """
+    Загрузка рецептов авторов одним запросом; при заданном limit —
+    только последних limit рецептов каждого автора.
+    """
+    if not authors:
+        return
+    recipes = Recipe.objects.order_by("-pub_date", "-id").only(
+        "id", "author_id", "name", "image", "cooking_time", "image_variants"
+    )
+    if limit is not None:
+        recipes = recipes.filter(
+            pk__in=latest_recipes_per_author(
+                [author.pk for author in authors], limit
+            )
+        )
+    prefetch_related_objects(authors, Prefetch("recipes", queryset=recipes))
+
+
 class CustomUserViewSet(UserViewSet):
     """
     ViewSet для работы с пользователями.
@@ -23,7 +57,23 @@ class CustomUserViewSet(UserViewSet):
     pagination_class = SixPagePagination
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
-    permission_classes = (IsAuthenticatedOrReadOnly,)
+    permission_classes = (IsCurrentUserOrAdminOrReadOnly,)
+
+    def get_queryset(self):
+        """
+        Аннотирует пользователей флагом подписки текущего пользователя.
+        """
+        user = self.request.user
+        queryset = super().get_queryset()
+
+        if user.is_anonymous:
+            return queryset
+
+        return queryset.annotate(
+            is_subscribed=Exists(
+                Follow.objects.filter(user=user, author=OuterRef("pk"))
+            )
+        )
 
     @action(
         methods=["GET"], detail=False, permission_classes=[IsAuthenticated]
@@ -39,19 +89,23 @@ class CustomUserViewSet(UserViewSet):
     @action(
         detail=False,
         methods=["GET"],
-        permission_classes=[IsAuthenticatedOrReadOnly],
+        permission_classes=[IsAuthenticated],
     )
     def subscriptions(self, request):
         """
         Метод отображение списка пользователей,
         на которых подписан текущий пользователь.
+        Страница собирается постоянным числом запросов.
         """
 
-        subscriptions_list = self.paginate_queryset(
-            User.objects.filter(following__user=request.user)
+        authors = self.paginate_queryset(
+            User.objects.filter(following__user=request.user).annotate(
+                is_subscribed=Value(True, output_field=BooleanField())
+            )
         )
+        prefetch_latest_recipes(authors, get_recipes_limit(request))
         serializer = FollowListSerializer(
-            subscriptions_list, many=True, context={"request": request}
+            authors, many=True, context={"request": request}
         )
         return self.get_paginated_response(serializer.data)
 